@@ -0,0 +1,146 @@
+"""
+Calendar events of a resident from APPOINTMENT, loaded by visible date range.
+
+Each resident has an interval index of the date ranges already loaded. A request for a range
+only queries the parts that are not covered yet (e.g. the new days of the next month's grid),
+and revisited ranges are answered from memory. Loaded ranges expire after APPOINTMENT_TTL
+seconds so new appointments show up.
+"""
+import os
+import time
+import bisect
+import threading
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
+
+MAX_RESIDENTS = 512
+
+
+def as_date(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+class IntervalIndex:
+    """Disjoint, sorted [start, end) date ranges with the events loaded for each."""
+
+    def __init__(self, ttl):
+        self._ttl = ttl
+        self._starts = []
+        self._ranges = []  # (start, end, loaded_at, events sorted by start)
+
+    def _expire(self):
+        now = time.monotonic()
+        kept = [item for item in self._ranges if now - item[2] < self._ttl]
+        if len(kept) != len(self._ranges):
+            self._ranges = kept
+            self._starts = [item[0] for item in kept]
+
+    def missing(self, start, end):
+        """Sub-ranges of [start, end) that are not loaded."""
+        self._expire()
+        gaps = []
+        cursor = start
+        for range_start, range_end, _, _ in self._ranges[max(bisect.bisect_right(self._starts, start) - 1, 0):]:
+            if range_start >= end:
+                break
+            if range_end <= cursor:
+                continue
+            if range_start > cursor:
+                gaps.append((cursor, range_start))
+            cursor = max(cursor, range_end)
+        if cursor < end:
+            gaps.append((cursor, end))
+        return gaps
+
+    def add(self, start, end, events):
+        if not self.missing(start, end):
+            return  # loaded meanwhile by another session
+        position = bisect.bisect_left(self._starts, start)
+        self._starts.insert(position, start)
+        self._ranges.insert(position, (start, end, time.monotonic(), sorted(events, key=lambda event: event[0])))
+
+    def events(self, start, end):
+        found = []
+        cursor = start  # days before the cursor are taken from an earlier range already
+        for range_start, range_end, _, events in self._ranges:
+            low, high = max(range_start, cursor), min(range_end, end)
+            if low < high:
+                found += [event for event in events if low <= as_date(event[0]) < high]
+                cursor = high
+        return found
+
+
+class AppointmentStore:
+    def __init__(self, ttl=300, max_residents=MAX_RESIDENTS):
+        self._ttl = ttl
+        self._max_residents = max_residents
+        self._indexes = OrderedDict()  # resident -> IntervalIndex, least recently used first
+        self._lock = threading.Lock()
+
+    def _index(self, resident):
+        index = self._indexes.get(resident)
+        if index is None:
+            index = self._indexes[resident] = IntervalIndex(self._ttl)
+            while len(self._indexes) > self._max_residents:
+                self._indexes.popitem(last=False)
+        self._indexes.move_to_end(resident)
+        return index
+
+    def events(self, resident, start, end):
+        """[(TIME_STAMP, DESCRIPTION)] of the resident in [start, end); loads only uncovered days."""
+        # imported on the first lookup: the Bewohner page imports this module before it renders
+        import queries
+
+        with self._lock:
+            gaps = self._index(resident).missing(start, end)
+        for gap_start, gap_end in gaps:
+            # uncached query: the index is the cache
+            df = queries.fetch("appointments_range", resident=resident, start=gap_start, end=gap_end)
+            rows = list(zip(df["TIME_STAMP"], df["DESCRIPTION"]))
+            with self._lock:
+                self._index(resident).add(gap_start, gap_end, rows)
+        with self._lock:
+            return self._index(resident).events(start, end)
+
+    def clear(self):
+        with self._lock:
+            self._indexes.clear()
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = AppointmentStore(ttl=float(os.environ.get("APPOINTMENT_TTL", 300)))
+        return _store
+
+
+def month_grid(month):
+    """[start, end) of the six-week dayGridMonth grid of the month (weeks start on Monday)."""
+    first = month.replace(day=1)
+    start = first - timedelta(days=first.weekday())
+    return start, start + timedelta(days=42)
+
+
+def shift_month(month, months):
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def calendar_events(resident, start, end):
+    """FullCalendar event dicts for the resident's appointments in [start, end)."""
+    events = []
+    for time_stamp, description in get_store().events(resident, start, end):
+        event = {"title": description, "start": time_stamp.isoformat() if hasattr(time_stamp, "isoformat") else str(time_stamp)}
+        if not isinstance(time_stamp, datetime) or time_stamp.time() == datetime.min.time():
+            event["allDay"] = True
+        events.append(event)
+    return events
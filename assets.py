@@ -0,0 +1,67 @@
+"""
+Static asset stage for the background and logo images.
+
+The source images are resized to their display resolution and recompressed as WebP once
+(at image build time via `python assets.py`, or lazily on first use) into ./static, which
+Streamlit serves under /app/static when server.enableStaticServing is on. Pages then reference
+a short URL instead of re-inlining ~540 KB of base64 on every rerun. If static serving is off,
+the optimized file is inlined as a data URI that is encoded once per process.
+"""
+import os
+import base64
+import hashlib
+import threading
+from functools import lru_cache
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+STATIC_DIR = os.path.join(ROOT, "static")
+
+# name -> (source file, max (width, height) in px, WebP quality)
+ASSETS = {
+    # shown blurred and full screen: 1280 px is plenty
+    "background.webp": ("background.jpg", (1280, 1280), 70),
+    # displayed at 150 px wide, 2x for high-density screens
+    "logo.webp": ("logo.png", (300, 300), 85),
+}
+
+_build_lock = threading.Lock()
+
+
+def build_asset(name):
+    """Write static/<name> from its source image unless it is already up to date."""
+    source, size, quality = ASSETS[name]
+    source_path = os.path.join(ROOT, source)
+    target_path = os.path.join(STATIC_DIR, name)
+    with _build_lock:
+        if os.path.exists(target_path) and os.path.getmtime(target_path) >= os.path.getmtime(source_path):
+            return target_path
+        from PIL import Image
+
+        os.makedirs(STATIC_DIR, exist_ok=True)
+        with Image.open(source_path) as img:
+            img = img.convert("RGBA" if "A" in img.getbands() else "RGB")
+            img.thumbnail(size, Image.LANCZOS)
+            tmp_path = target_path + ".tmp"
+            img.save(tmp_path, "WEBP", quality=quality, method=6)
+        os.replace(tmp_path, target_path)
+    return target_path
+
+
+def build_all():
+    return [build_asset(name) for name in ASSETS]
+
+
+@lru_cache(maxsize=None)
+def asset_url(name, static_serving=True):
+    """URL for an asset: a versioned /app/static path, or a data URI when static serving is off."""
+    with open(build_asset(name), "rb") as f:
+        data = f.read()
+    if static_serving:
+        # the content hash changes the URL whenever the file changes, so browsers may cache it
+        return f"app/static/{name}?v={hashlib.sha1(data).hexdigest()[:10]}"
+    return "data:image/webp;base64," + base64.b64encode(data).decode()
+
+
+if __name__ == "__main__":
+    for path in build_all():
+        print(f"{os.path.relpath(path, ROOT)}: {os.path.getsize(path) / 1024:.0f} KB")
@@ -0,0 +1,142 @@
+"""
+Daily attendance per meal time and caretaker as a local columnar time series.
+
+The warehouse aggregates HISTORICAL_DATA to one row per day, meal time and caretaker
+("daily_attendance"); the app keeps those rows as an Arrow table and, unless TREND_CACHE_PATH is
+empty (default: attendance_daily.arrow next to the app), in an Arrow file that survives restarts.
+Later loads only fetch days at or after the cached MEAL_DATE watermark (the last day is
+replaced to pick up late rows), at most once per CACHE_TTL_DAILY seconds.
+
+Long ranges are downsampled by summing days into equal buckets before plotting, so the chart
+gets at most TREND_MAX_POINTS points per line, ends on the last day and the rates stay exact
+per bucket.
+"""
+import os
+import time
+import threading
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.ipc as ipc
+
+import queries
+
+CACHE_PATH = os.environ.get(
+    "TREND_CACHE_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "attendance_daily.arrow")
+)
+HISTORY_DAYS = int(os.environ.get("TREND_HISTORY_DAYS", 365))
+MAX_POINTS = int(os.environ.get("TREND_MAX_POINTS", 120))
+
+
+def to_table(df):
+    return pa.table({
+        "DAY": pa.array(pd.to_datetime(df["MEAL_DATE"]).dt.date, type=pa.date32()),
+        "MEALTIME": pa.array(df["MEALTIME"].astype(str)).dictionary_encode(),
+        "EMPLOYEE": pa.array(df["EMPLOYEE"].astype(object).where(df["EMPLOYEE"].notna(), "–")).dictionary_encode(),
+        "APPEARED_YES": pa.array(df["APPEARED_YES"].astype("int32")),
+        "MEALS": pa.array(df["MEALS"].astype("int32")),
+    })
+
+
+class TrendCache:
+    def __init__(self, path=CACHE_PATH, refresh_interval=queries.TTL_DAILY):
+        self._path = path
+        self._refresh_interval = refresh_interval
+        self._table = None
+        self._checked_at = None
+        self._lock = threading.Lock()
+
+    def _load_file(self):
+        if self._path and os.path.exists(self._path):
+            with pa.memory_map(self._path) as source:
+                return ipc.open_file(source).read_all()
+        return None
+
+    def _save_file(self, table):
+        if not self._path:
+            return
+        work_path = self._path + ".tmp"
+        with pa.OSFile(work_path, "wb") as sink, ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+        os.replace(work_path, self._path)
+
+    def table(self, day):
+        """Daily rows up to `day`; fetches only days at or after the watermark."""
+        with self._lock:
+            if self._table is None:
+                self._table = self._load_file()
+            fresh = self._checked_at is not None and time.monotonic() - self._checked_at < self._refresh_interval
+            if self._table is not None and fresh:
+                return self._table
+
+            watermark = None
+            if self._table is not None and self._table.num_rows:
+                watermark = self._table["DAY"].to_numpy().max().astype(object)
+            start = watermark or day - timedelta(days=HISTORY_DAYS)
+            # uncached: this cache holds the rows, each day is only fetched again as the last one
+            incoming = to_table(queries.fetch("daily_attendance", start=start, day=day))
+            if watermark is None:
+                table = incoming
+            else:
+                days = self._table["DAY"].to_numpy()
+                kept = self._table.filter(pa.array(days < np.datetime64(watermark)))
+                table = pa.concat_tables([kept, incoming])
+            self._table = table.unify_dictionaries().combine_chunks()
+            self._checked_at = time.monotonic()
+            self._save_file(self._table)
+            return self._table
+
+    def reset(self):
+        with self._lock:
+            self._table = None
+            self._checked_at = None
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = TrendCache()
+        return _cache
+
+
+def daily_series(days, by, **params):
+    """Per day and group (MEALTIME or EMPLOYEE): meals served and attended over the last `days` days."""
+    end = queries.dashboard_params(**params)["day"]
+    table = get_cache().table(end)
+    start = np.datetime64(end - timedelta(days=days - 1))
+    day_column = table["DAY"].to_numpy()
+    table = table.filter(pa.array(day_column >= start))
+    df = pd.DataFrame({
+        "DAY": table["DAY"].to_numpy(),
+        "GROUP": table[by].to_pandas(),
+        "APPEARED_YES": table["APPEARED_YES"].to_numpy(),
+        "MEALS": table["MEALS"].to_numpy(),
+    })
+    return df.groupby(["DAY", "GROUP"], observed=True, as_index=False)[["APPEARED_YES", "MEALS"]].sum()
+
+
+def downsample(df, max_points=MAX_POINTS):
+    """
+    Sum days into equal buckets so each group has at most max_points points; adds RATE.
+    The first and the last day keep a point of their own, so the line spans the whole range.
+    """
+    if df.empty:
+        return df.assign(RATE=pd.Series(dtype=float))
+    days = df["DAY"].to_numpy().astype("datetime64[D]")
+    first, last = days.min(), days.max()
+    span = int((last - first).astype(int)) + 1
+    if span > max_points:
+        # the days between the first and the last one share the other max_points - 2 points
+        bucket_days = -(-(span - 2) // max(max_points - 2, 1))
+        offsets = (days - first).astype(int)
+        inner = first + (1 + (offsets - 1) // bucket_days * bucket_days).astype("timedelta64[D]")
+        buckets = np.where((days == first) | (days == last), days, inner)
+        df = df.assign(DAY=buckets).groupby(["DAY", "GROUP"], observed=True, as_index=False)[["APPEARED_YES", "MEALS"]].sum()
+    return df.assign(RATE=df["APPEARED_YES"] / df["MEALS"].where(df["MEALS"] > 0))
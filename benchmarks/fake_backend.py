@@ -0,0 +1,295 @@
+"""
+Deterministic in-memory stand-ins for Snowflake and the Meteomatics weather API.
+
+install() puts a fake `snowflake.connector` into sys.modules before the app imports it. It is
+backed by a shared in-memory SQLite database seeded with a fixed pseudo-random data set shaped
+like the real tables, returns results as Arrow batches like Snowflake's result chunks, and
+counts connections, queries and fetched bytes. start_weather_stub()
+serves the two Meteomatics endpoints the app uses from a local HTTP server.
+"""
+import json
+import random
+import sqlite3
+import sys
+import threading
+import types
+import uuid
+import zlib
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DB_URI = "file:fake_snowflake?mode=memory&cache=shared"
+ARROW_BATCH_ROWS = 5000  # rows per result batch; results of the larger queries span several
+REFERENCE_DATE = date(2025, 3, 19)
+DAYS = 90
+RESIDENTS = 120
+EMPLOYEES = ["Employee A", "Employee B", "Employee C", "Employee D"]
+MEALTIMES = ["breakfast", "lunch", "dinner"]
+MEALS = ["Nudeln mit Tomatensauce", "Hähnchen mit Reis", "Gemüsesuppe", "Fisch mit Kartoffeln",
+         "Pizza", "Salat mit Brot", "Braten mit Knödel"]
+APPOINTMENTS = ["Arzttermin", "Besuch vom Enkelkind", "Kaffee trinken", "Physiotherapie", "Friseur"]
+
+
+class Stats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.connections_opened = 0
+            self.open_connections = 0
+            self.peak_open_connections = 0
+            self.queries = 0
+            self.bytes_fetched = 0
+
+    def reset_peak(self):
+        """Start a new peak measurement from the connections open right now."""
+        with self._lock:
+            self.peak_open_connections = self.open_connections
+
+    def add(self, **deltas):
+        with self._lock:
+            for name, delta in deltas.items():
+                setattr(self, name, getattr(self, name) + delta)
+            self.peak_open_connections = max(self.peak_open_connections, self.open_connections)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "connections_opened": self.connections_opened,
+                "open_connections": self.open_connections,
+                "peak_open_connections": self.peak_open_connections,
+                "queries": self.queries,
+                "bytes_fetched": self.bytes_fetched,
+            }
+
+
+stats = Stats()
+_keeper = None  # keeps the shared in-memory database alive
+
+
+def _row_bytes(row):
+    return sum(len(str(value).encode()) for value in row if value is not None)
+
+
+# ---------- FAKE snowflake.connector ----------
+class Error(Exception):
+    pass
+
+
+class DatabaseError(Error):
+    pass
+
+
+class OperationalError(DatabaseError):
+    pass
+
+
+class ProgrammingError(DatabaseError):
+    pass
+
+
+class NotSupportedError(DatabaseError):
+    pass
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self._cur = conn.cursor()
+        self.sfqid = None
+        self.description = None
+        self.rowcount = -1
+
+    def execute(self, query, params=None):
+        stats.add(queries=1)
+        self.sfqid = str(uuid.uuid4())
+        try:
+            self._cur.execute(query, tuple(params or ()))
+        except sqlite3.Error as err:
+            raise ProgrammingError(str(err)) from err
+        self.description = [
+            (desc[0].upper(),) + tuple(desc[1:]) for desc in self._cur.description or ()
+        ]
+        self.rowcount = self._cur.rowcount
+        return self
+
+    def fetch_arrow_batches(self):
+        """Result batches as Arrow tables, like Snowflake's result chunks; no batch when empty."""
+        import pyarrow as pa
+
+        names = [desc[0] for desc in self.description]
+        while True:
+            rows = self._cur.fetchmany(ARROW_BATCH_ROWS)
+            if not rows:
+                return
+            stats.add(bytes_fetched=sum(_row_bytes(row) for row in rows))
+            yield pa.table({name: pa.array(list(column)) for name, column in zip(names, zip(*rows))})
+
+    def fetch_arrow_all(self, force_return_table=False):
+        import pyarrow as pa
+
+        batches = list(self.fetch_arrow_batches())
+        if batches:
+            return pa.concat_tables(batches, promote_options="permissive")
+        if force_return_table:
+            return pa.table({desc[0]: pa.array([], pa.string()) for desc in self.description})
+        return None
+
+    def fetchall(self):
+        rows = self._cur.fetchall()
+        stats.add(bytes_fetched=sum(_row_bytes(row) for row in rows))
+        return rows
+
+    def fetchone(self):
+        row = self._cur.fetchone()
+        if row is not None:
+            stats.add(bytes_fetched=_row_bytes(row))
+        return row
+
+    def close(self):
+        self._cur.close()
+
+
+class FakeConnection:
+    def __init__(self, **kwargs):
+        self._conn = _open_db()
+        self._closed = False
+        stats.add(connections_opened=1, open_connections=1)
+
+    def cursor(self):
+        if self._closed:
+            raise OperationalError("Connection is closed")
+        return FakeCursor(self._conn)
+
+    def is_closed(self):
+        return self._closed
+
+    def close(self):
+        if not self._closed:
+            self._closed = True
+            self._conn.close()
+            stats.add(open_connections=-1)
+
+
+def connect(**kwargs):
+    return FakeConnection(**kwargs)
+
+
+def _open_db():
+    conn = sqlite3.connect(DB_URI, uri=True, check_same_thread=False)
+    # like Snowflake's HASH(expr, ...): a deterministic number per combination of values
+    conn.create_function("HASH", -1, lambda *values: zlib.crc32("\x1f".join(map(str, values)).encode()), deterministic=True)
+    return conn
+
+
+# ---------- DATA ----------
+def _report_html(title, sections):
+    parts = [f"<html><body><h1>{title}</h1>"]
+    for index in range(sections):
+        parts.append(f"<h2>Abschnitt {index + 1}</h2>")
+        parts.append("<p>" + " ".join(["Lorem ipsum dolor sit amet."] * 40) + "</p>")
+    parts.append("</body></html>")
+    return "".join(parts)
+
+
+def seed(conn, rng):
+    conn.executescript("""
+        CREATE TABLE PERSON (PERSON_ID INTEGER, EMPLOYEE TEXT);
+        CREATE TABLE MEALPLAN (MEALPLAN_ID INTEGER, MEAL_DATE TEXT, MEALTIME TEXT, MEAL TEXT);
+        CREATE TABLE HISTORICAL_DATA (PERSON_ID INTEGER, MEAL_DATE TEXT, MEALPLAN_ID INTEGER, APPEARED TEXT);
+        CREATE TABLE APPOINTMENT (PERSON_ID INTEGER, TIME_STAMP TEXT, DESCRIPTION TEXT);
+        CREATE TABLE OUTLIER_DETECTION (PERSON_ID INTEGER, DATE_ TEXT);
+        CREATE TABLE OUTLIER_DAILY_SUMMARY (DAY TEXT, EMPLOYEE TEXT, MEALTIME TEXT, OUTLIER_COUNT INTEGER);
+        CREATE TABLE OPENAI_REPORT (REPORT_TYPE TEXT, REPORT TEXT);
+    """)
+    persons = [(person_id, EMPLOYEES[person_id % len(EMPLOYEES)]) for person_id in range(1, RESIDENTS + 1)]
+    conn.executemany("INSERT INTO PERSON VALUES (?, ?)", persons)
+
+    first_day = REFERENCE_DATE - timedelta(days=DAYS)
+    propensity = {person_id: 0.6 + 0.35 * rng.random() for person_id, _ in persons}
+    mealplans, history, appointments, outliers, summary = [], [], [], [], {}
+    mealplan_id = 0
+    # history up to the day before the reference date, meal plan and appointments two weeks beyond
+    for offset in range(DAYS + 14):
+        day = first_day + timedelta(days=offset)
+        for mealtime in MEALTIMES:
+            mealplan_id += 1
+            mealplans.append((mealplan_id, day.isoformat(), mealtime, rng.choice(MEALS)))
+            if day >= REFERENCE_DATE:
+                continue
+            for person_id, employee in persons:
+                appeared = rng.random() < propensity[person_id]
+                history.append((person_id, day.isoformat(), mealplan_id, "Yes" if appeared else "No"))
+                if not appeared and rng.random() < 0.1:
+                    outliers.append((person_id, day.isoformat()))
+                    key = (day.isoformat(), employee, mealtime)
+                    summary[key] = summary.get(key, 0) + 1
+        for person_id, _ in persons:
+            if rng.random() < 0.05:
+                appointments.append((person_id, day.isoformat(), rng.choice(APPOINTMENTS)))
+    conn.executemany("INSERT INTO MEALPLAN VALUES (?, ?, ?, ?)", mealplans)
+    conn.executemany("INSERT INTO HISTORICAL_DATA VALUES (?, ?, ?, ?)", history)
+    conn.executemany("INSERT INTO APPOINTMENT VALUES (?, ?, ?)", appointments)
+    conn.executemany("INSERT INTO OUTLIER_DETECTION VALUES (?, ?)", outliers)
+    conn.executemany("INSERT INTO OUTLIER_DAILY_SUMMARY VALUES (?, ?, ?, ?)",
+                     [key + (count,) for key, count in sorted(summary.items())])
+    conn.executemany("INSERT INTO OPENAI_REPORT VALUES (?, ?)", [
+        ("outlier", _report_html("Ausreißer-Bericht", 12)),
+        ("forecast", _report_html("Wochen-Forecast", 8)),
+    ])
+    conn.commit()
+
+
+def install(seed_value=42):
+    """Register the fake connector as snowflake.connector and seed the database (once)."""
+    global _keeper
+    if _keeper is None:
+        sqlite3.register_adapter(date, date.isoformat)
+        _keeper = _open_db()
+        seed(_keeper, random.Random(seed_value))
+
+    errors = types.ModuleType("snowflake.connector.errors")
+    for cls in (Error, DatabaseError, OperationalError, ProgrammingError, NotSupportedError):
+        setattr(errors, cls.__name__, cls)
+    connector = types.ModuleType("snowflake.connector")
+    connector.connect = connect
+    connector.errors = errors
+    connector.paramstyle = "qmark"
+    package = types.ModuleType("snowflake")
+    package.connector = connector
+    sys.modules.update({
+        "snowflake": package,
+        "snowflake.connector": connector,
+        "snowflake.connector.errors": errors,
+    })
+    return stats
+
+
+# ---------- WEATHER STUB ----------
+class _WeatherHandler(BaseHTTPRequestHandler):
+    requests = 0
+
+    def do_GET(self):
+        type(self).requests += 1
+        if self.path.startswith("/api/v1/token"):
+            body = {"access_token": "stub-token", "token_type": "bearer"}
+        else:
+            body = {"data": [{"coordinates": [{"dates": [{"value": 12.3}]}]}]}
+        payload = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_weather_stub():
+    """Serve the Meteomatics endpoints locally; returns (server, login_url, api_url)."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _WeatherHandler)
+    threading.Thread(target=server.serve_forever, name="weather-stub", daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    return server, base + "/api/v1/token", base
@@ -0,0 +1,93 @@
+"""
+Bytes sent to the browser and wall time per interaction, against a real Streamlit server.
+
+One session (see live.py) opens the app and then goes through the interactions of every
+page: a sidebar click on the open page, a click that switches pages, the report section,
+the calendar months and the trend controls. A widget inside a fragment only reruns that
+fragment, so its row shows what the fragment costs; a page switch reruns the whole app.
+Bytes are the serialized ForwardMsgs before websocket compression.
+
+    python benchmarks/interactions.py [--repeat 3] [--root CHECKOUT] [--thresholds FILE] [--update]
+
+--root measures the app.py of another checkout (e.g. a git worktree of an older commit) with
+this benchmark's fake backend; interactions whose widget that version does not have are
+skipped. Exits with status 1 when an interaction exceeds its "interaction:" limits in
+thresholds.json; --update writes them as render.py does (10% above the bytes sent).
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path[:0] = [HERE]
+
+import live  # noqa: E402
+from render import check, update_thresholds  # noqa: E402
+
+# (scenario, action, widget key, option index)
+INTERACTIONS = [
+    ("open: Pflege Dashboard", "open", None, None),
+    ("sidebar: same page", "click", "btn_home", None),
+    ("report: next section", "select", "report_section_outlier", 1),
+    ("sidebar: -> Wochen Empfehlungen", "click", "btn_site2", None),
+    ("sidebar: -> Bewohner Dashboard", "click", "btn_site3", None),
+    ("calendar: next month", "click", "calendar_next", None),
+    ("calendar: back", "click", "calendar_previous", None),
+    ("sidebar: -> Anwesenheits-Trends", "click", "btn_site4", None),
+    ("trends: range", "select", "trend_range", 0),
+    ("trends: grouping", "select", "trend_group", 1),
+    ("sidebar: -> Pflege Dashboard", "click", "btn_home", None),
+]
+
+
+def run_session(server):
+    results = {}
+    client = live.Client(server)
+    try:
+        for name, action, key, option in INTERACTIONS:
+            if key is not None and key not in client.widgets:
+                continue
+            args = [] if key is None else [key] if option is None else [key, option]
+            results[name] = getattr(client, action)(*args)
+        if client.errors:
+            raise RuntimeError("App raised: " + client.errors[0])
+    finally:
+        client.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--root", default=live.ROOT, help="checkout whose app.py is served")
+    parser.add_argument("--thresholds", default=os.path.join(HERE, "thresholds.json"))
+    parser.add_argument("--update", action="store_true", help="write thresholds from this run (with headroom)")
+    args = parser.parse_args()
+
+    with live.serve(os.path.abspath(args.root)) as server:
+        live.Client(server).open()  # warm the process-wide caches first
+        runs = [run_session(server) for _ in range(args.repeat)]
+
+    results = {}
+    print(f"{'interaction':<36} {'ms':>8} {'bytes':>8}")
+    for name in runs[0]:
+        ms = statistics.median(run[name].ms for run in runs)
+        sent = statistics.median(run[name].bytes for run in runs)
+        print(f"{name:<36} {ms:>8.1f} {sent:>8.0f}")
+        results["interaction:" + name] = {"ms": ms, "sent": sent}
+
+    if args.update:
+        update_thresholds(args.thresholds, results)
+        return 0
+
+    with open(args.thresholds) as f:
+        failures = check(results, json.load(f))
+    for failure in failures:
+        print("REGRESSION " + failure)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
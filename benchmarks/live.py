@@ -0,0 +1,221 @@
+"""
+Drive a real `streamlit run` server of the dashboard over its websocket, like a browser.
+
+serve() starts app.py in a child process against the fake Snowflake connector and the local
+weather stub (see fake_backend.py), with the fake backend counters served as JSON on a
+second port. Client speaks Streamlit's websocket protocol: it sends the rerun requests a
+browser sends (the changed widget, the fragment it belongs to, the hashes of the cached
+messages) and reads ForwardMsgs until the run has finished, so every interaction is measured
+as wall time and bytes received.
+
+AppTest reruns the whole script for every widget, also for one inside a fragment, and keeps
+one Runtime per process, so fragment payloads and concurrent sessions are measured here.
+"""
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from collections import namedtuple
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+
+TIMEOUT = 60
+
+Server = namedtuple("Server", "url stats_url pid")
+Interaction = namedtuple("Interaction", "ms bytes")
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _get(url, data=None):
+    with urllib.request.urlopen(url, data=data, timeout=TIMEOUT) as response:
+        return response.read()
+
+
+@contextmanager
+def serve(root=ROOT, env=None):
+    """Run app.py of `root` in a child process; yields its Server."""
+    port, stats_port = free_port(), free_port()
+    with tempfile.TemporaryFile("w+") as log:
+        process = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), "--serve", root, str(port), str(stats_port)],
+            cwd=root, env={**os.environ, **(env or {})}, stdout=log, stderr=subprocess.STDOUT,
+        )
+        server = Server(f"http://127.0.0.1:{port}", f"http://127.0.0.1:{stats_port}", process.pid)
+        try:
+            deadline = time.monotonic() + TIMEOUT
+            while True:
+                if process.poll() is not None:
+                    log.seek(0)
+                    raise RuntimeError(f"streamlit exited with {process.returncode}:\n{log.read()}")
+                try:
+                    _get(server.url + "/_stcore/health")
+                    break
+                except OSError:
+                    if time.monotonic() > deadline:
+                        raise
+                    time.sleep(0.2)
+            yield server
+        finally:
+            process.terminate()
+            try:
+                process.wait(10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.wait()
+
+
+def backend_stats(server):
+    """Counters of the fake connector in the server process (see fake_backend.Stats)."""
+    return json.loads(_get(server.stats_url))
+
+
+def reset_peak(server):
+    _get(server.stats_url, data=b"")
+
+
+def rss_bytes(server):
+    """Resident set size of the server process."""
+    with open(f"/proc/{server.pid}/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+class Client:
+    """One browser session: a websocket to the server and the widgets it has been sent."""
+
+    def __init__(self, server):
+        from websockets.sync.client import connect
+
+        self._ws = connect(
+            server.url.replace("http", "ws", 1) + "/_stcore/stream",
+            subprotocols=["streamlit"], max_size=None, open_timeout=TIMEOUT,
+        )
+        self.widgets = {}  # user key -> (widget id, id of the enclosing fragment or "")
+        self.options = {}  # user key -> option labels of a selectbox or radio
+        self.errors = []
+        self._cached = set()
+        self._page_hash = ""
+
+    def open(self):
+        return self._rerun()
+
+    def click(self, key):
+        from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+        widget_id, fragment_id = self.widgets[key]
+        return self._rerun(WidgetState(id=widget_id, trigger_value=True), fragment_id)
+
+    def select(self, key, index):
+        """Choose an option of a selectbox or radio by its position."""
+        from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+        widget_id, fragment_id = self.widgets[key]
+        label = self.options[key][index]
+        return self._rerun(WidgetState(id=widget_id, string_value=label), fragment_id)
+
+    def close(self):
+        self._ws.close()
+
+    def _rerun(self, widget_state=None, fragment_id=""):
+        from streamlit.proto.BackMsg_pb2 import BackMsg
+        from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+        msg = BackMsg()
+        client_state = msg.rerun_script
+        client_state.page_script_hash = self._page_hash
+        client_state.cached_message_hashes.extend(sorted(self._cached))
+        if widget_state is not None:
+            client_state.widget_states.widgets.append(widget_state)
+        client_state.fragment_id = fragment_id
+
+        start = time.perf_counter()
+        self._ws.send(msg.SerializeToString())
+        received = 0
+        while True:
+            data = self._ws.recv(timeout=TIMEOUT)
+            received += len(data)
+            forward = ForwardMsg()
+            forward.ParseFromString(data)
+            if forward.metadata.cacheable:
+                self._cached.add(forward.hash)
+            kind = forward.WhichOneof("type")
+            if kind == "new_session":
+                self._page_hash = forward.new_session.page_script_hash
+            elif kind == "delta":
+                self._track(forward.delta)
+            elif kind == "script_finished" and forward.script_finished != ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                return Interaction((time.perf_counter() - start) * 1000, received)
+
+    def _track(self, delta):
+        from streamlit.elements.lib.utils import user_key_from_element_id
+
+        if delta.WhichOneof("type") != "new_element":
+            return
+        element = delta.new_element
+        kind = element.WhichOneof("type")
+        if kind == "exception":
+            self.errors.append(element.exception.message)
+            return
+        proto = getattr(element, kind) if kind else None
+        widget_id = getattr(proto, "id", "")
+        key = user_key_from_element_id(widget_id) if widget_id else None
+        if key:
+            self.widgets[key] = (widget_id, delta.fragment_id)
+            if hasattr(proto, "options"):
+                self.options[key] = list(proto.options)
+
+
+# ---------- SERVER PROCESS ----------
+def _stats_handler(stats):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            payload = json.dumps(stats.snapshot()).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_POST(self):
+            stats.reset_peak()
+            self.do_GET()
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def _serve(root, port, stats_port):
+    import threading
+
+    sys.path[:0] = [HERE]
+    from render import setup
+    from streamlit.web import cli
+
+    stats = setup()
+    os.chdir(root)
+    sys.path[:0] = [root]
+    server = ThreadingHTTPServer(("127.0.0.1", int(stats_port)), _stats_handler(stats))
+    threading.Thread(target=server.serve_forever, name="fake-stats", daemon=True).start()
+    sys.argv = [
+        "streamlit", "run", os.path.join(root, "app.py"),
+        "--server.address", "127.0.0.1", "--server.port", port, "--server.headless", "true",
+        "--server.fileWatcherType", "none", "--browser.gatherUsageStats", "false",
+    ]
+    sys.exit(cli.main())
+
+
+if __name__ == "__main__" and sys.argv[1:2] == ["--serve"]:
+    _serve(*sys.argv[2:5])
@@ -0,0 +1,135 @@
+"""
+Concurrent-session load test of the dashboard.
+
+Starts the app with `streamlit run` against the fake Snowflake connector and the local
+weather stub (see live.py and fake_backend.py) and connects N browser sessions at once over
+the websocket. Each session opens the app on one page and then clicks through the sidebar
+between the pages. For each session count it reports
+
+    latency   p50 / p90 / p99 / max of page opens and of navigation clicks
+    memory    resident set growth of the server while the sessions are open, per session
+    backend   peak open connections, connections opened and queries run
+
+    python benchmarks/load.py [--sessions 1,5,10,20] [--steps 6] [--think 0.2] [--cold]
+
+All sessions share one server process, its caches and its pool, like the single Streamlit
+server in Dockerfile.koyeb. Without --cold the server is started once and warmed with one
+session per page; with --cold every level gets a fresh server.
+"""
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path[:0] = [HERE]
+
+import live  # noqa: E402
+from render import NAV_KEYS, PAGES  # noqa: E402
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile."""
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    rank = max(1, int(round(pct / 100 * len(ordered))))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def open_page(client, page):
+    """Open the app (it starts on the first page) and switch to `page`; returns ms."""
+    ms = client.open().ms
+    if page != PAGES[0]:
+        ms += client.click(NAV_KEYS[page]).ms
+    return ms
+
+
+def run_session(server, index, steps, think, barrier, timings, errors, clients):
+    rng = random.Random(index)
+    page = PAGES[index % len(PAGES)]
+    try:
+        client = live.Client(server)
+        clients.append(client)  # kept open until memory is measured
+        barrier.wait()
+        timings["open"].append(open_page(client, page))
+        for _ in range(steps):
+            time.sleep(rng.uniform(0, think * 2))
+            target = rng.choice([p for p in PAGES if p != page])
+            timings["nav"].append(client.click(NAV_KEYS[target]).ms)
+            page = target
+        if client.errors:
+            errors.append(f"session {index}: {client.errors[0]}")
+    except Exception as err:
+        errors.append(f"session {index}: {err!r}")
+
+
+def warm(server):
+    for page in PAGES:
+        client = live.Client(server)
+        open_page(client, page)
+        client.close()
+
+
+def run_level(server, sessions, steps, think):
+    rss_before = live.rss_bytes(server)
+    before = live.backend_stats(server)
+    live.reset_peak(server)
+
+    timings = {"open": [], "nav": []}
+    errors, clients = [], []
+    barrier = threading.Barrier(sessions)
+    with ThreadPoolExecutor(max_workers=sessions) as executor:
+        for index in range(sessions):
+            executor.submit(run_session, server, index, steps, think, barrier, timings, errors, clients)
+
+    growth = live.rss_bytes(server) - rss_before
+    after = live.backend_stats(server)
+    for client in clients:
+        client.close()
+    return {
+        "timings": timings,
+        "errors": errors,
+        "rss_per_session": growth / sessions,
+        "peak_connections": after["peak_open_connections"],
+        "connections_opened": after["connections_opened"] - before["connections_opened"],
+        "queries": after["queries"] - before["queries"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", default="1,5,10,20", help="comma-separated concurrent session counts")
+    parser.add_argument("--steps", type=int, default=6, help="navigation clicks per session")
+    parser.add_argument("--think", type=float, default=0.2, help="mean think time between clicks, seconds")
+    parser.add_argument("--cold", action="store_true", help="start a fresh server (empty caches and pool) for each level")
+    args = parser.parse_args()
+
+    print(f"{'sessions':>8} {'kind':>5} {'n':>5} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'max ms':>8}"
+          f" {'MB/sess':>8} {'peak conn':>9} {'opened':>6} {'queries':>7}")
+    failed = False
+    with ExitStack() as stack:
+        shared = None if args.cold else stack.enter_context(live.serve())
+        if shared is not None:
+            warm(shared)
+        for sessions in [int(value) for value in args.sessions.split(",")]:
+            with ExitStack() as level_stack:
+                server = shared or level_stack.enter_context(live.serve())
+                result = run_level(server, sessions, args.steps, args.think)
+            for kind, values in result["timings"].items():
+                print(f"{sessions:>8} {kind:>5} {len(values):>5} {percentile(values, 50):>8.1f}"
+                      f" {percentile(values, 90):>8.1f} {percentile(values, 99):>8.1f} {max(values, default=float('nan')):>8.1f}"
+                      f" {result['rss_per_session'] / 2**20:>8.2f} {result['peak_connections']:>9}"
+                      f" {result['connections_opened']:>6} {result['queries']:>7}")
+            for error in result["errors"]:
+                print("ERROR " + error)
+                failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,226 @@
+"""
+Headless render benchmark of the three dashboard pages.
+
+Drives app.py with Streamlit's AppTest harness against the fake Snowflake connector and the
+local weather stub (see fake_backend.py) and reports, per scenario, the median wall time,
+the number of queries and the bytes fetched:
+
+    cold:<page>     first render with empty caches and connection pool
+    warm:<page>     first render of a new session once the shared caches are warm
+    nav:<a> -> <b>  rerun cost of a sidebar click in an open session
+    calendar:<step> calendar month navigation on the resident page (loads only the new days)
+
+Exits with status 1 when a scenario exceeds its limits in thresholds.json. --update writes
+the limits from the medians of this run: twice the time plus 50 ms (machines differ), the
+same number of queries, and 10% above the bytes fetched (the fake data set is fixed). Take
+them from --repeat 5 or more.
+
+    python benchmarks/render.py [--repeat 3] [--thresholds FILE] [--update]
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path[:0] = [ROOT, HERE]
+
+import fake_backend  # noqa: E402
+
+PAGES = ["Pflege Dashboard", "Wochen Empfehlungen", "Bewohner Dashboard", "Anwesenheits-Trends"]
+NAV_KEYS = {
+    "Pflege Dashboard": "btn_home",
+    "Wochen Empfehlungen": "btn_site2",
+    "Bewohner Dashboard": "btn_site3",
+    "Anwesenheits-Trends": "btn_site4",
+}
+NAVIGATION = [
+    ("Pflege Dashboard", "Wochen Empfehlungen"),
+    ("Wochen Empfehlungen", "Bewohner Dashboard"),
+    ("Bewohner Dashboard", "Anwesenheits-Trends"),
+    ("Anwesenheits-Trends", "Pflege Dashboard"),
+    ("Pflege Dashboard", "Pflege Dashboard"),
+]
+TIMEOUT = 60
+MS_FACTOR, MS_SLACK = 2, 50
+BYTES_FACTOR = 1.1
+
+
+def setup():
+    """Point the app at the fakes. Must run before any app module is imported."""
+    stats = fake_backend.install()
+    _, login_url, api_url = fake_backend.start_weather_stub()
+    os.environ.update({
+        "DATA_BACKEND": "snowflake",
+        "PREWARM_ENABLED": "0",
+        "DASHBOARD_DATE": fake_backend.REFERENCE_DATE.isoformat(),
+        "DASHBOARD_RESIDENT": "1",
+        "TREND_CACHE_PATH": "",
+        "WEATHER_LOGIN_URL": login_url,
+        "WEATHER_API_URL": api_url,
+    })
+    os.chdir(ROOT)
+    return stats
+
+
+def reset_app_state():
+    """Empty the process-wide caches and connection pool, as after a restart."""
+    if "db" in sys.modules:
+        sys.modules["db"].invalidate()
+        sys.modules["db"].close_pool()
+    if "reports" in sys.modules:
+        sys.modules["reports"].reset()
+    if "report_pages" in sys.modules:
+        sys.modules["report_pages"].reset()
+    if "prefetch" in sys.modules:
+        sys.modules["prefetch"].reset()
+    if "outlier_detector" in sys.modules:
+        sys.modules["outlier_detector"].reset()
+    if "forecast" in sys.modules:
+        sys.modules["forecast"].reset()
+    if "appointments" in sys.modules:
+        sys.modules["appointments"].get_store().clear()
+    if "resident_week" in sys.modules:
+        sys.modules["resident_week"].reset()
+    if "attendance_trends" in sys.modules:
+        sys.modules["attendance_trends"].get_cache().reset()
+    if "snapshot" in sys.modules:
+        sys.modules["snapshot"].reset()
+
+
+def new_session(page):
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(os.path.join(ROOT, "app.py"), default_timeout=TIMEOUT)
+    at.session_state["page"] = page
+    return at
+
+
+def measure(stats, action):
+    before = stats.snapshot()
+    start = time.perf_counter()
+    at = action()
+    elapsed = (time.perf_counter() - start) * 1000
+    after = stats.snapshot()
+    if at.exception:
+        raise RuntimeError(f"App raised: {at.exception[0].message}")
+    return {
+        "ms": elapsed,
+        "queries": after["queries"] - before["queries"],
+        "bytes": after["bytes_fetched"] - before["bytes_fetched"],
+    }
+
+
+def run_scenarios(stats):
+    results = {}
+
+    for page in PAGES:
+        reset_app_state()
+        results[f"cold:{page}"] = measure(stats, lambda: new_session(page).run())
+        results[f"warm:{page}"] = measure(stats, lambda: new_session(page).run())
+
+    # navigation is measured with warm caches: it should cost reruns, not queries
+    for page in PAGES:
+        new_session(page).run()
+    for source, target in NAVIGATION:
+        at = new_session(source).run()
+        results[f"nav:{source} -> {target}"] = measure(
+            stats, lambda: at.button(key=NAV_KEYS[target]).click().run()
+        )
+
+    at = new_session("Bewohner Dashboard").run()
+    for step, key in [("next month", "calendar_next"), ("back", "calendar_previous")]:
+        results[f"calendar:{step}"] = measure(stats, lambda: at.button(key=key).click().run())
+
+    at = new_session("Pflege Dashboard").run()
+    results["report:next section"] = measure(stats, lambda: at.selectbox(key="report_section_outlier").select(1).run())
+
+    # a restart with a nightly snapshot bundle (see snapshot.py): the first loads come from the bundle
+    import snapshot
+
+    with tempfile.TemporaryDirectory() as directory:
+        snapshot.export(directory)
+        os.environ["SNAPSHOT_DIR"] = directory
+        try:
+            for page in PAGES:
+                reset_app_state()
+                results[f"snapshot:{page}"] = measure(stats, lambda: new_session(page).run())
+        finally:
+            del os.environ["SNAPSHOT_DIR"]
+            reset_app_state()
+    return results
+
+
+def median_results(runs):
+    merged = {}
+    for name in runs[0]:
+        merged[name] = {field: statistics.median(run[name][field] for run in runs) for field in runs[0][name]}
+    return merged
+
+
+def check(results, thresholds):
+    failures = []
+    for name, result in results.items():
+        limits = thresholds.get(name, {})
+        for field, value in result.items():
+            limit = limits.get("max_" + field)
+            if limit is not None and value > limit:
+                failures.append(f"{name}: {field} {value:.0f} > {limit}")
+    return failures
+
+
+def calibrate(result):
+    """Limits for a scenario from its measured medians (see the module docstring)."""
+    limits = {"max_ms": round(result["ms"] * MS_FACTOR + MS_SLACK)}
+    for field, value in result.items():
+        if field == "queries":
+            limits["max_queries"] = int(value)
+        elif field != "ms":
+            limits["max_" + field] = round(value * BYTES_FACTOR)
+    return limits
+
+
+def update_thresholds(path, results):
+    """Replace the limits of the measured scenarios; other scenarios in the file are kept."""
+    try:
+        with open(path) as f:
+            thresholds = json.load(f)
+    except FileNotFoundError:
+        thresholds = {}
+    thresholds.update((name, calibrate(result)) for name, result in results.items())
+    with open(path, "w") as f:
+        json.dump(thresholds, f, indent=2)
+        f.write("\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--thresholds", default=os.path.join(HERE, "thresholds.json"))
+    parser.add_argument("--update", action="store_true", help="write thresholds from this run (with headroom)")
+    args = parser.parse_args()
+
+    stats = setup()
+    results = median_results([run_scenarios(stats) for _ in range(args.repeat)])
+
+    print(f"{'scenario':<52} {'ms':>8} {'queries':>8} {'bytes':>10}")
+    for name, result in results.items():
+        print(f"{name:<52} {result['ms']:>8.1f} {result['queries']:>8.0f} {result['bytes']:>10.0f}")
+
+    if args.update:
+        update_thresholds(args.thresholds, results)
+        return 0
+
+    with open(args.thresholds) as f:
+        failures = check(results, json.load(f))
+    for failure in failures:
+        print("REGRESSION " + failure)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,95 @@
+"""
+Cold-start import cost of the app shell and of each page.
+
+Every measurement runs in a fresh interpreter, so nothing is cached in sys.modules.
+"eager (before)" imports what app.py used to import at the top for every page;
+"shell" is what app.py imports now (read from its top-level import statements), and each page
+row adds that page's module (views.PAGES) on top.
+
+When snowflake-connector-python is not installed, the fake connector from fake_backend.py is
+registered before the timer starts. The "before" row then leaves out the real connector's
+import cost, so it understates the saving.
+
+    python benchmarks/startup.py [--repeat 5]
+"""
+import argparse
+import ast
+import os
+import statistics
+import subprocess
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path[:0] = [ROOT]
+
+EAGER_BEFORE = ("import streamlit, dotenv, pandas, requests, plotly.express, snowflake.connector, "
+                "PIL.Image, streamlit_calendar, streamlit.components.v1")
+
+# not timed: the fake connector stands in when the real one is missing
+PRELUDE = f"""
+import sys
+sys.path[:0] = [{ROOT!r}, {HERE!r}]
+try:
+    import importlib.util
+    real = importlib.util.find_spec("snowflake.connector") is not None
+except ModuleNotFoundError:
+    real = False
+if not real:
+    import fake_backend
+    fake_backend.install()
+"""
+TIMER = PRELUDE + "import time; t = time.perf_counter(); {}; print(time.perf_counter() - t)"
+
+
+def shell_imports(path=os.path.join(ROOT, "app.py")):
+    """The module-level import statements of app.py, as one statement."""
+    with open(path) as source:
+        tree = ast.parse(source.read())
+    modules = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            modules += [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.level == 0:
+            modules.append(node.module)
+    return "import " + ", ".join(dict.fromkeys(modules))
+
+
+def cases():
+    from views import PAGES
+
+    shell = shell_imports()
+    return [("eager (before)", EAGER_BEFORE), ("shell", shell)] + [
+        (f"shell + {title}", f"{shell}; import {module}") for title, module in PAGES.items()
+    ]
+
+
+def measure(statement, repeat):
+    timings = []
+    for _ in range(repeat):
+        out = subprocess.run(
+            [sys.executable, "-c", TIMER.format(statement)],
+            cwd=ROOT, capture_output=True, text=True,
+        )
+        if out.returncode:
+            raise RuntimeError(f"{statement} failed:\n{out.stderr}")
+        timings.append(float(out.stdout.strip().splitlines()[-1]) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    selected = cases()
+    print("shell:", selected[1][1])
+    results = [(name, measure(statement, args.repeat)) for name, statement in selected]
+    baseline = results[0][1]
+    print(f"{'case':<36} {'median ms':>10} {'vs before':>10}")
+    for name, ms in results:
+        print(f"{name:<36} {ms:>10.1f} {ms / baseline:>9.0%}")
+
+
+if __name__ == "__main__":
+    main()
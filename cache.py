@@ -0,0 +1,173 @@
+import os
+import re
+import time
+import threading
+from collections import OrderedDict, namedtuple
+from concurrent.futures import Future, ThreadPoolExecutor
+
+
+def normalize_sql(query):
+    # collapse whitespace and drop the trailing semicolon so formatting differences share one entry
+    return re.sub(r"\s+", " ", query).strip().rstrip(";").strip()
+
+
+def make_key(query, params=None):
+    if params is None:
+        params_key = ()
+    elif isinstance(params, dict):
+        params_key = tuple(sorted(params.items()))
+    else:
+        params_key = tuple(params)
+    return (normalize_sql(query), params_key)
+
+
+# a loader result that was already `age` seconds old when loaded (e.g. from the shared cache),
+# so the entry expires when the original would
+Aged = namedtuple("Aged", "value age")
+
+
+def _unwrap(result):
+    if isinstance(result, Aged):
+        return result.value, result.age
+    return result, 0
+
+
+class _Entry:
+    __slots__ = ("value", "fetched_at", "ttl", "stale_ttl", "refreshing")
+
+    def __init__(self, value, ttl, stale_ttl, age=0):
+        self.value = value
+        self.fetched_at = time.monotonic() - age
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.refreshing = False
+
+
+class QueryCache:
+    """
+    Process-wide TTL cache for query results, shared by all Streamlit sessions.
+    - entries are evicted least-recently-used once max_entries is reached
+    - an entry older than its ttl but younger than ttl + stale_ttl is served as is
+      while one background refresh replaces it (stale-while-revalidate)
+    - concurrent misses for the same key wait for a single load instead of each querying
+    - a loader may return Aged(value, age) for a value that was already that old (e.g. one
+      from the shared cache); its entry then expires when the original does
+    Cached values are shared between sessions and must not be modified in place.
+    """
+
+    def __init__(self, max_entries=256, default_ttl=300, default_stale_ttl=600):
+        self._max_entries = max_entries
+        self._default_ttl = default_ttl
+        self._default_stale_ttl = default_stale_ttl
+        self._entries = OrderedDict()
+        self._loading = {}
+        self._counts = {"hits": 0, "stale_hits": 0, "misses": 0, "waits": 0}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="cache-refresh")
+
+    def get_or_load(self, key, loader, ttl=None, stale_ttl=None):
+        ttl = self._default_ttl if ttl is None else ttl
+        stale_ttl = self._default_stale_ttl if stale_ttl is None else stale_ttl
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                age = time.monotonic() - entry.fetched_at
+                if age < entry.ttl + entry.stale_ttl:
+                    self._entries.move_to_end(key)
+                    if age >= entry.ttl:
+                        self._counts["stale_hits"] += 1
+                        if not entry.refreshing:
+                            entry.refreshing = True
+                            self._executor.submit(self._refresh, key, loader, ttl, stale_ttl)
+                    else:
+                        self._counts["hits"] += 1
+                    return entry.value
+                del self._entries[key]
+            future = self._loading.get(key)
+            owner = future is None
+            self._counts["misses" if owner else "waits"] += 1
+            if owner:
+                future = Future()
+                self._loading[key] = future
+        if not owner:
+            return future.result()
+
+        try:
+            value, age = _unwrap(loader())
+        except BaseException as err:
+            with self._lock:
+                del self._loading[key]
+            future.set_exception(err)
+            raise
+        with self._lock:
+            del self._loading[key]
+            self._store(key, value, ttl, stale_ttl, age)
+        future.set_result(value)
+        return value
+
+    def refresh(self, key, loader, ttl=None, stale_ttl=None):
+        """Load now and replace the entry, e.g. to pre-warm it before users ask for it."""
+        ttl = self._default_ttl if ttl is None else ttl
+        stale_ttl = self._default_stale_ttl if stale_ttl is None else stale_ttl
+        value, age = _unwrap(loader())
+        with self._lock:
+            self._store(key, value, ttl, stale_ttl, age)
+        return value
+
+    def invalidate(self, key=None):
+        """Drop one key, or everything when no key is given."""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def invalidate_matching(self, text):
+        """Drop every entry whose SQL mentions text (e.g. a table name), case-insensitive."""
+        text = text.lower()
+        with self._lock:
+            for key in [k for k in self._entries if text in k[0].lower()]:
+                del self._entries[key]
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "loading": len(self._loading), "max_entries": self._max_entries, **self._counts}
+
+    def _refresh(self, key, loader, ttl, stale_ttl):
+        try:
+            value, age = _unwrap(loader())
+        except Exception:
+            # keep serving the stale value; the next request after it expires retries
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    entry.refreshing = False
+            return
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                # keep a longer stale window granted by a pre-warm
+                stale_ttl = max(stale_ttl, entry.stale_ttl)
+            self._store(key, value, ttl, stale_ttl, age)
+
+    def _store(self, key, value, ttl, stale_ttl, age=0):
+        self._entries[key] = _Entry(value, ttl, stale_ttl, age)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = QueryCache(
+                max_entries=int(os.environ.get("QUERY_CACHE_SIZE", 256)),
+                default_ttl=float(os.environ.get("QUERY_CACHE_TTL", 300)),
+                default_stale_ttl=float(os.environ.get("QUERY_CACHE_STALE_TTL", 600)),
+            )
+        return _cache
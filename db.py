@@ -0,0 +1,415 @@
+import os
+import time
+import atexit
+import hashlib
+import logging
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import pandas as pd
+import snowflake.connector
+from snowflake.connector.errors import NotSupportedError, OperationalError
+
+import instrumentation
+from cache import get_cache, make_key
+from shared_cache import get_shared_cache
+
+logger = logging.getLogger("db")
+
+# Low-cardinality text columns that are returned as pandas categoricals
+CATEGORICAL_COLUMNS = ("APPEARED", "REPORT_TYPE", "MEALTIME", "EMPLOYEE")
+# 0/1 flag columns stored as int8; other integers (IDs, counts) keep their width so that sums
+# and concatenations cannot overflow
+SMALL_INT_COLUMNS = ("PRESENT", "HAS_APPOINTMENT")
+
+
+def create_conn():
+    return snowflake.connector.connect(
+        user=os.environ.get("SNOWFLAKE_USER"),
+        password=os.environ.get("SNOWFLAKE_PASSWORD"),
+        account=os.environ.get("SNOWFLAKE_ACCOUNT"),
+        warehouse=os.environ.get("SNOWFLAKE_WAREHOUSE"),
+        database=os.environ.get("SNOWFLAKE_DATABASE"),
+        schema=os.environ.get("SNOWFLAKE_SCHEMA"),
+        # server-side binding of ? placeholders (see queries.py)
+        paramstyle="qmark",
+    )
+
+
+def create_timed_conn():
+    start = time.perf_counter()
+    conn = create_conn()
+    instrumentation.record_connect(time.perf_counter() - start)
+    return conn
+
+
+class ConnectionPool:
+    """
+    Thread-safe pool of Snowflake connections shared by all sessions of the process.
+    Idle connections are reused most-recently-used first, pinged before reuse when they
+    have been idle for a while, and closed once they exceed the idle limit.
+    """
+
+    def __init__(self, factory, max_size=4, max_idle=600, ping_after=60, timeout=30):
+        self._factory = factory
+        self._max_size = max_size
+        self._max_idle = max_idle
+        self._ping_after = ping_after
+        self._timeout = timeout
+        self._idle = []  # (conn, last_used), oldest first
+        self._in_use = 0
+        self._closed = False
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        deadline = time.monotonic() + self._timeout
+        expired = []
+        conn = None
+        last_used = None
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise RuntimeError("Connection pool is closed")
+                expired += self._take_expired()
+                if self._idle:
+                    conn, last_used = self._idle.pop()
+                    self._in_use += 1
+                    break
+                if self._in_use < self._max_size:
+                    self._in_use += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError("No Snowflake connection available after %.0fs" % self._timeout)
+                self._cond.wait(remaining)
+        self._close_all(expired)
+
+        if conn is not None and not self._is_healthy(conn, last_used):
+            self._close_all([conn])
+            conn = None
+        if conn is None:
+            try:
+                conn = self._factory()
+            except Exception:
+                with self._cond:
+                    self._in_use -= 1
+                    self._cond.notify()
+                raise
+        return conn
+
+    def release(self, conn, discard=False):
+        to_close = []
+        with self._cond:
+            self._in_use -= 1
+            if self._closed or discard or conn.is_closed():
+                to_close.append(conn)
+            else:
+                self._idle.append((conn, time.monotonic()))
+            to_close += self._take_expired()
+            self._cond.notify()
+        self._close_all(to_close)
+
+    @contextmanager
+    def connection(self):
+        conn = self.acquire()
+        try:
+            yield conn
+        except OperationalError:
+            # network / session problems: do not hand this connection out again
+            self.release(conn, discard=True)
+            raise
+        except BaseException:
+            self.release(conn)
+            raise
+        else:
+            self.release(conn)
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            to_close = [conn for conn, _ in self._idle]
+            self._idle = []
+            self._cond.notify_all()
+        self._close_all(to_close)
+
+    def stats(self):
+        with self._cond:
+            return {"idle": len(self._idle), "in_use": self._in_use, "max_size": self._max_size}
+
+    def _take_expired(self):
+        now = time.monotonic()
+        expired = [conn for conn, last_used in self._idle if now - last_used > self._max_idle]
+        if expired:
+            self._idle = [(conn, last_used) for conn, last_used in self._idle if now - last_used <= self._max_idle]
+        return expired
+
+    def _is_healthy(self, conn, last_used):
+        if conn.is_closed():
+            return False
+        if time.monotonic() - last_used < self._ping_after:
+            return True
+        try:
+            cur = conn.cursor()
+            cur.execute("SELECT 1")
+            cur.close()
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    def _close_all(conns):
+        for conn in conns:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # settings are read here (not at import) so values from .env apply
+            _pool = ConnectionPool(
+                create_timed_conn,
+                max_size=int(os.environ.get("SNOWFLAKE_POOL_SIZE", 4)),
+                max_idle=float(os.environ.get("SNOWFLAKE_POOL_MAX_IDLE", 600)),     # seconds before an idle connection is closed
+                ping_after=float(os.environ.get("SNOWFLAKE_POOL_PING_AFTER", 60)),  # idle seconds before a SELECT 1 health check
+                timeout=float(os.environ.get("SNOWFLAKE_POOL_TIMEOUT", 30)),        # seconds to wait for a free connection
+            )
+        return _pool
+
+
+@atexit.register
+def close_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
+
+
+def fetch_frame(cur, categories=CATEGORICAL_COLUMNS):
+    """
+    Build a DataFrame from an executed cursor via Arrow result batches.
+    Each batch is converted to pandas as it arrives and its Arrow buffers are released right
+    away, so the whole result never exists as Arrow and pandas at the same time, and rows are
+    never materialized as Python tuples. Low-cardinality text columns become categoricals.
+    """
+    headers = [desc[0] for desc in cur.description]
+    try:
+        batches = cur.fetch_arrow_batches()
+    except NotSupportedError:
+        # result is not in Arrow format (e.g. SHOW / DESCRIBE statements)
+        return pd.DataFrame(cur.fetchall(), columns=headers)
+
+    frames = [arrow_to_frame(table, categories) for table in batches]
+    if not frames:
+        return pd.DataFrame(columns=headers)
+    if len(frames) == 1:
+        return frames[0]
+    with instrumentation.phase("frame"):
+        df = pd.concat(frames, ignore_index=True)
+        del frames
+        for name in categories:
+            # batches with different categories concatenate to object
+            if name in df.columns and not isinstance(df[name].dtype, pd.CategoricalDtype):
+                df[name] = df[name].astype("category")
+    return df
+
+
+def arrow_to_frame(table, categories=CATEGORICAL_COLUMNS):
+    with instrumentation.phase("frame"):
+        df = table.to_pandas(
+            categories=[name for name in categories if name in table.column_names],
+            split_blocks=True,
+            self_destruct=True,  # free Arrow buffers column by column while converting
+        )
+        del table
+        for name in SMALL_INT_COLUMNS:
+            if name in df.columns and pd.api.types.is_integer_dtype(df[name]):
+                df[name] = df[name].astype("int8")
+    return df
+
+
+def _record_result(event, df):
+    event.rows = len(df)
+    event.bytes = int(df.memory_usage(deep=True).sum())
+
+
+def run_remote_query(query, params=None):
+    with instrumentation.query(query, "snowflake") as event:
+        start = time.perf_counter()
+        with get_pool().connection() as conn:
+            event.phases["acquire"] += time.perf_counter() - start  # includes a login when the pool grows
+            cur = conn.cursor()
+            with instrumentation.phase("execute"):
+                cur.execute(query, params)
+            event.query_id = cur.sfqid
+            with instrumentation.phase("fetch"):  # includes "frame"
+                df = fetch_frame(cur)
+            cur.close()
+        _record_result(event, df)
+    return df
+
+
+# ---------- DATA BACKEND ----------
+# snowflake: always query Snowflake (default)
+# replica:   serve from the local DuckDB replica (see replica.py), Snowflake only on a miss
+# local:     replica only, for development and benchmarks without credentials
+DATA_BACKEND = os.environ.get("DATA_BACKEND", "snowflake")
+
+_replica = None
+_replica_lock = threading.Lock()
+
+
+def get_replica():
+    global _replica
+    if DATA_BACKEND not in ("replica", "local"):
+        return None
+    with _replica_lock:
+        if _replica is None:
+            from replica import ReplicaBackend, REPLICA_PATH
+
+            _replica = ReplicaBackend(os.environ.get("REPLICA_PATH", REPLICA_PATH))
+        return _replica
+
+
+def get_snapshot():
+    """The nightly snapshot bundle (see snapshot.py) when SNAPSHOT_DIR is set, else None."""
+    from snapshot import get_store
+
+    return get_store()
+
+
+def run_query(query, params=None, use_snapshot=True):
+    snapshot = get_snapshot() if use_snapshot else None
+    if snapshot is not None:
+        table = snapshot.take(make_key(query, params))
+        if table is not None:
+            with instrumentation.query(query, "snapshot") as event:
+                df = arrow_to_frame(table)
+                _record_result(event, df)
+            return df
+    replica = get_replica()
+    if replica is not None:
+        with instrumentation.query(query, "replica") as event:
+            df = replica.query(query, params)
+            if df is not None:
+                _record_result(event, df)
+            else:
+                event.backend = "replica_miss"
+        if df is not None:
+            return df
+        if DATA_BACKEND == "local":
+            raise LookupError("Query cannot be served from the local replica: " + query)
+    return run_remote_query(query, params)
+
+
+def shared_key(key):
+    return "query:" + hashlib.sha256(repr(key).encode()).hexdigest()
+
+
+# seconds in which a refresh reuses a result another replica has just stored (e.g. the same pre-warm run)
+SHARED_REFRESH_WINDOW = float(os.environ.get("SHARED_CACHE_REFRESH_WINDOW", 120))
+
+
+def _loader(key, query, params, ttl, stale_ttl, refresh=False):
+    """Load from the warehouse, through the cache shared by all replicas when one is configured."""
+    shared = get_shared_cache()
+    if shared is None:
+        return lambda: run_query(query, params, use_snapshot=not refresh)
+    return lambda: shared.load(
+        shared_key(key),
+        lambda: run_query(query, params, use_snapshot=not refresh),
+        ttl=ttl,
+        stale_ttl=stale_ttl,
+        max_age=SHARED_REFRESH_WINDOW if refresh else None,
+        serve_stale=not refresh,
+        text=key[0],
+        with_age=True,
+    )
+
+
+def get_context_data(query, params=None, ttl=None, stale_ttl=None):
+    """Cached query result shared across sessions; the returned DataFrame must not be modified in place."""
+    key = make_key(query, params)
+    return get_cache().get_or_load(
+        key,
+        _loader(key, query, params, ttl, stale_ttl),
+        ttl=ttl,
+        stale_ttl=stale_ttl,
+    )
+
+
+def refresh_context_data(query, params=None, ttl=None, stale_ttl=None):
+    """Run the query now and replace its cache entry."""
+    key = make_key(query, params)
+    return get_cache().refresh(
+        key,
+        _loader(key, query, params, ttl, stale_ttl, refresh=True),
+        ttl=ttl,
+        stale_ttl=stale_ttl,
+    )
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # keep this at or below the pool size so workers do not queue for connections
+            _executor = ThreadPoolExecutor(
+                max_workers=int(os.environ.get("QUERY_WORKERS", 4)),
+                thread_name_prefix="query",
+            )
+        return _executor
+
+
+def iter_concurrently(queries):
+    """
+    Run several independent get_context_data() calls on the shared worker pool.
+    `queries` maps a name to the keyword arguments of get_context_data, or to a zero-argument
+    callable for other loaders; (name, result, error) triples are yielded in completion order so
+    the caller can render each result as soon as it is ready. A failed task yields its exception
+    as `error` (and None as result) instead of raising, so one failure does not stop the others.
+    Workers never touch Streamlit, rendering stays on the script thread.
+    """
+    futures = {}
+    for name, task in queries.items():
+        if callable(task):
+            futures[get_executor().submit(task)] = name
+        else:
+            futures[get_executor().submit(get_context_data, **task)] = name
+    for future in as_completed(futures):
+        name = futures[future]
+        try:
+            result = future.result()
+        except Exception as err:
+            logger.exception("Loading %s failed", name)
+            yield name, None, err
+        else:
+            yield name, result, None
+
+
+def invalidate(query=None, params=None):
+    key = None if query is None else make_key(query, params)
+    get_cache().invalidate(key)
+    shared = get_shared_cache()
+    if shared is not None:
+        shared.delete(None if key is None else shared_key(key))
+
+
+def invalidate_matching(text):
+    get_cache().invalidate_matching(text)
+    shared = get_shared_cache()
+    if shared is not None:
+        shared.delete_matching(text)
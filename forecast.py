@@ -0,0 +1,205 @@
+"""
+Local weekly attendance forecast for the "Wochen Empfehlungen" page (FORECAST_SOURCE=local).
+
+Every resident and meal time has an attendance model: the share of days attended per weekday,
+weighted so that older days count less (half-life FORECAST_HALF_LIFE days) and shrunk towards
+the resident's overall share where a weekday has little data. A per-meal factor (how much
+better or worse a dish is attended than the meal time's average) adjusts the days of the
+planned MEALPLAN. All models are fitted at once from decayed sums; the sums are the cached
+state, so new days only age them and add their own rows.
+"""
+import os
+import threading
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+
+import queries
+
+ENABLED = os.environ.get("FORECAST_SOURCE", "report").lower() == "local"
+HISTORY_DAYS = int(os.environ.get("FORECAST_HISTORY_DAYS", 120))
+
+WEEKDAYS = ["Mo", "Di", "Mi", "Do", "Fr", "Sa", "So"]
+MEALTIME_LABELS = {"breakfast": "Frühstück", "lunch": "Mittagessen", "dinner": "Abendessen"}
+
+
+def prepare(df):
+    return pd.DataFrame({
+        "PERSON_ID": df["PERSON_ID"].to_numpy(),
+        "MEALTIME": df["MEALTIME"].astype(str).to_numpy(),
+        "MEAL": df["MEAL"].astype(str).to_numpy(),
+        "DAY": pd.to_datetime(df["MEAL_DATE"]).dt.date.to_numpy(),
+        "PRESENT": df["PRESENT"].astype(float).to_numpy(),
+    })
+
+
+class AttendanceModel:
+    def __init__(self, half_life=28, prior_strength=3.0, active_days=14, meal_factor_range=(0.5, 1.5)):
+        self.decay = 0.5 ** (1 / half_life)
+        self.prior_strength = prior_strength
+        self.active_days = active_days  # residents not seen for longer are left out of the forecast
+        self.meal_factor_range = meal_factor_range
+        self.last_day = None
+        self._keys = {}  # (PERSON_ID, MEALTIME) -> row
+        self._attended = np.zeros((0, 7))  # decayed attended days per series and weekday
+        self._days = np.zeros((0, 7))  # decayed days with data per series and weekday
+        self._last_seen = np.zeros(0, dtype="datetime64[D]")
+        self._meals = pd.DataFrame(columns=["ATTENDED", "DAYS"], index=pd.MultiIndex.from_tuples([], names=["MEALTIME", "MEAL"]))
+
+    def _rows(self, df):
+        keys = pd.MultiIndex.from_arrays([df["PERSON_ID"], df["MEALTIME"]])
+        new = [key for key in keys.unique() if key not in self._keys]
+        if new:
+            for key in new:
+                self._keys[key] = len(self._keys)
+            self._attended = np.vstack([self._attended, np.zeros((len(new), 7))])
+            self._days = np.vstack([self._days, np.zeros((len(new), 7))])
+            self._last_seen = np.concatenate([self._last_seen, np.full(len(new), np.datetime64("1900-01-01"), dtype="datetime64[D]")])
+        return np.fromiter((self._keys[key] for key in keys), dtype=np.intp, count=len(keys))
+
+    def update(self, df):
+        """Add prepared rows of days after last_day (the whole history on the first call)."""
+        if df.empty:
+            return
+        last_day = max(df["DAY"])
+        if self.last_day is not None:
+            # age the state to the new last day
+            factor = self.decay ** (last_day - self.last_day).days
+            self._attended *= factor
+            self._days *= factor
+            self._meals *= factor
+        age = np.array([(last_day - day).days for day in df["DAY"]], dtype=float)
+        weights = self.decay ** age
+        present = df["PRESENT"].to_numpy(dtype=float)
+        rows = self._rows(df)
+        weekdays = pd.to_datetime(df["DAY"]).dt.weekday.to_numpy()
+        np.add.at(self._attended, (rows, weekdays), weights * present)
+        np.add.at(self._days, (rows, weekdays), weights)
+        np.maximum.at(self._last_seen, rows, df["DAY"].to_numpy().astype("datetime64[D]"))
+
+        meals = pd.DataFrame({
+            "MEALTIME": df["MEALTIME"], "MEAL": df["MEAL"], "ATTENDED": weights * present, "DAYS": weights,
+        }).groupby(["MEALTIME", "MEAL"])[["ATTENDED", "DAYS"]].sum()
+        self._meals = self._meals.add(meals, fill_value=0)
+        self.last_day = last_day
+
+    def probabilities(self):
+        """(series keys, attendance probability per series and weekday) of the active residents."""
+        if self.last_day is None:
+            # fitted on no attendance at all
+            return np.array([], dtype=object), np.zeros((0, 7))
+        overall = (self._attended.sum(axis=1) + 0.5) / (self._days.sum(axis=1) + 1)
+        k = self.prior_strength
+        probability = (self._attended + k * overall[:, None]) / (self._days + k)
+        active = self._last_seen >= np.datetime64(self.last_day - timedelta(days=self.active_days))
+        keys = np.array(list(self._keys), dtype=object)
+        return keys[active], probability[active]
+
+    def meal_factors(self):
+        """Attendance of each (MEALTIME, MEAL) relative to its meal time's average."""
+        if self._meals.empty:
+            return pd.Series(dtype=float)
+        by_mealtime = self._meals.groupby(level="MEALTIME").sum()
+        base = (by_mealtime["ATTENDED"] / by_mealtime["DAYS"]).reindex(self._meals.index, level="MEALTIME")
+        k = self.prior_strength
+        rate = (self._meals["ATTENDED"] + k * base) / (self._meals["DAYS"] + k)
+        # a meal time nobody attended has no average to compare with: leave its dishes neutral
+        return (rate / base.where(base > 0)).clip(*self.meal_factor_range).fillna(1.0)
+
+    def predict(self, plan):
+        """Expected attendance for planned meals (MEAL_DATE, MEALTIME, MEAL rows); empty without attendance."""
+        keys, probability = self.probabilities()
+        mealtimes = np.array([mealtime for _, mealtime in keys], dtype=object)
+        result = plan[["MEAL_DATE", "MEALTIME", "MEAL"]].copy()
+        if not len(keys):
+            result = result.iloc[:0]
+        result["MEAL_DATE"] = pd.to_datetime(result["MEAL_DATE"]).dt.date
+        result["MEALTIME"] = result["MEALTIME"].astype(str)
+        result["MEAL"] = result["MEAL"].astype(str)
+
+        # expected residents per meal time and weekday, then scaled by the planned dish
+        expected = {mealtime: probability[mealtimes == mealtime].sum(axis=0) for mealtime in np.unique(mealtimes)}
+        residents = {mealtime: int((mealtimes == mealtime).sum()) for mealtime in expected}
+        weekdays = pd.to_datetime(result["MEAL_DATE"]).dt.weekday.to_numpy()
+        base = np.array([
+            expected[mealtime][weekday] if mealtime in expected else 0.0
+            for mealtime, weekday in zip(result["MEALTIME"], weekdays)
+        ])
+        factors = self.meal_factors()
+        factor = np.array([factors.get((mealtime, meal), 1.0) for mealtime, meal in zip(result["MEALTIME"], result["MEAL"])])
+        result["EXPECTED"] = base * factor
+        result["RESIDENTS"] = [residents.get(mealtime, 0) for mealtime in result["MEALTIME"]]
+        return result
+
+
+_model = None
+_model_day = None  # dashboard day the model has been brought up to (its last_day is the last day with data)
+_forecasts = {}  # reference date -> (plan DataFrame, model day, forecast)
+_lock = threading.Lock()
+
+
+def new_model():
+    """A fresh, unfitted model with the FORECAST_* settings; fitted_model keeps the one in use."""
+    return AttendanceModel(
+        half_life=float(os.environ.get("FORECAST_HALF_LIFE", 28)),
+        active_days=int(os.environ.get("FORECAST_ACTIVE_DAYS", 14)),
+    )
+
+
+def _fetch(start, end):
+    # not through the query cache: fitted_model asks only for days after the model's last one,
+    # so a cached range would never be read again
+    return prepare(queries.fetch("meal_attendance", start=start, day=end))
+
+
+def fitted_model(**params):
+    """The model, brought up to the dashboard day; only days after its last one are fetched."""
+    global _model, _model_day
+    day = queries.dashboard_params(**params)["day"]
+    with _lock:
+        if _model is None or _model_day > day:
+            model = new_model()
+            model.update(_fetch(day - timedelta(days=HISTORY_DAYS), day))
+            _model = model
+        elif _model_day < day:
+            _model.update(_fetch(_model_day + timedelta(days=1), day))
+        _model_day = day
+        return _model
+
+
+def weekly_forecast(**params):
+    """Expected attendance per planned meal for the 7 days from the reference date."""
+    params = queries.dashboard_params(**params)
+    model = fitted_model(**params)
+    plan = queries.run("mealplan_range", start=params["reference_date"], day=params["reference_date"] + timedelta(days=6))
+    order = {mealtime: position for position, mealtime in enumerate(MEALTIME_LABELS)}
+    with _lock:
+        cached = _forecasts.get(params["reference_date"])
+        if cached is not None and cached[0] is plan and cached[1] == model.last_day:
+            return cached[2]
+        result = model.predict(plan).sort_values(
+            ["MEAL_DATE", "MEALTIME"], key=lambda column: column.map(order) if column.name == "MEALTIME" else column,
+        ).reset_index(drop=True)
+        _forecasts.clear()
+        _forecasts[params["reference_date"]] = (plan, model.last_day, result)
+    return result
+
+
+def reset():
+    global _model, _model_day
+    with _lock:
+        _model = None
+        _model_day = None
+        _forecasts.clear()
+
+
+def forecast_table(forecast):
+    """The forecast as shown on the page (German labels)."""
+    return pd.DataFrame({
+        "Datum": [f"{WEEKDAYS[day.weekday()]} {day:%d.%m.}" for day in forecast["MEAL_DATE"]],
+        "Mahlzeit": [MEALTIME_LABELS.get(mealtime, mealtime) for mealtime in forecast["MEALTIME"]],
+        "Gericht": forecast["MEAL"],
+        "Erwartet": forecast["EXPECTED"].round().astype(int),
+        "Quote": (forecast["EXPECTED"] / forecast["RESIDENTS"].where(forecast["RESIDENTS"] > 0)).fillna(0),
+    })
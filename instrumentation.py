@@ -0,0 +1,272 @@
+"""
+Per-query and per-section timings of the dashboard.
+
+Every query that reaches a backend records its label (the named query, or the start of the
+SQL), backend, time spent per phase (connect, acquire, execute, fetch, frame), row count,
+result bytes and Snowflake query ID. Page sections wrapped in section() record their
+duration. The data is exposed as
+- Prometheus text on http://METRICS_HOST:METRICS_PORT/metrics (when METRICS_PORT is set;
+  METRICS_HOST defaults to 127.0.0.1, use 0.0.0.0 for a scraper on another host)
+- log lines on the "instrumentation" logger (METRICS_LOG=1)
+- a debug panel in the sidebar (DEBUG_PANEL=1 or ?debug=1 in the URL)
+"""
+import os
+import re
+import sys
+import time
+import logging
+import threading
+from collections import deque, defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger("instrumentation")
+if os.environ.get("METRICS_LOG", "").lower() in ("1", "true", "yes") and not logger.handlers:
+    logger.addHandler(logging.StreamHandler())
+    logger.setLevel(logging.INFO)
+
+RECENT_EVENTS = 200
+
+_lock = threading.Lock()
+_local = threading.local()
+_labels = {}  # normalized SQL -> query name
+_recent = deque(maxlen=RECENT_EVENTS)
+_query_totals = defaultdict(lambda: {"count": 0, "errors": 0, "seconds": 0.0, "rows": 0, "bytes": 0})
+_phase_seconds = defaultdict(float)  # (label, phase) -> seconds
+_section_totals = defaultdict(lambda: {"count": 0, "seconds": 0.0})
+_connect = {"count": 0, "seconds": 0.0}
+_server = None
+_server_attempted = False
+
+
+def _normalize(sql):
+    return re.sub(r"\s+", " ", sql).strip()
+
+
+def register_label(sql, name):
+    _labels[_normalize(sql)] = name
+
+
+def label_for(sql):
+    normalized = _normalize(sql)
+    return _labels.get(normalized) or normalized[:60]
+
+
+class QueryEvent:
+    def __init__(self, label, backend):
+        self.label = label
+        self.backend = backend
+        self.started_at = datetime.now()
+        self.phases = defaultdict(float)
+        self.seconds = 0.0
+        self.rows = 0
+        self.bytes = 0
+        self.query_id = None
+        self.error = None
+
+    def as_dict(self):
+        return {
+            "time": f"{self.started_at:%H:%M:%S}",
+            "query": self.label,
+            "backend": self.backend,
+            "ms": round(self.seconds * 1000, 1),
+            **{f"{name}_ms": round(seconds * 1000, 1) for name, seconds in self.phases.items()},
+            "rows": self.rows,
+            "bytes": self.bytes,
+            "query_id": self.query_id,
+            "error": self.error,
+        }
+
+
+@contextmanager
+def query(sql, backend):
+    """Record one backend query; phase() calls on the same thread attach to it."""
+    event = QueryEvent(label_for(sql), backend)
+    _local.event = event
+    start = time.perf_counter()
+    try:
+        yield event
+    except Exception as err:
+        event.error = type(err).__name__
+        raise
+    finally:
+        event.seconds = time.perf_counter() - start
+        _local.event = None
+        _record(event)
+
+
+@contextmanager
+def phase(name):
+    event = getattr(_local, "event", None)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if event is not None:
+            event.phases[name] += time.perf_counter() - start
+
+
+@contextmanager
+def section(name):
+    """Time a page section (figure building, iframe render, ...)."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        with _lock:
+            _section_totals[name]["count"] += 1
+            _section_totals[name]["seconds"] += seconds
+        logger.info("section=%s ms=%.1f", name, seconds * 1000)
+
+
+def record_connect(seconds):
+    """Time of a Snowflake login (connection creation)."""
+    with _lock:
+        _connect["count"] += 1
+        _connect["seconds"] += seconds
+    event = getattr(_local, "event", None)
+    if event is not None:
+        event.phases["connect"] += seconds
+    logger.info("connect ms=%.1f", seconds * 1000)
+
+
+def _record(event):
+    with _lock:
+        totals = _query_totals[(event.label, event.backend)]
+        totals["count"] += 1
+        totals["errors"] += event.error is not None
+        totals["seconds"] += event.seconds
+        totals["rows"] += event.rows
+        totals["bytes"] += event.bytes
+        for name, seconds in event.phases.items():
+            _phase_seconds[(event.label, name)] += seconds
+        _recent.append(event)
+    logger.info(
+        "query=%r backend=%s ms=%.1f rows=%d bytes=%d query_id=%s error=%s",
+        event.label, event.backend, event.seconds * 1000, event.rows, event.bytes, event.query_id, event.error,
+    )
+
+
+def recent_events():
+    with _lock:
+        return [event.as_dict() for event in reversed(_recent)]
+
+
+def section_summary():
+    with _lock:
+        return [
+            {"section": name, "count": totals["count"], "avg_ms": round(totals["seconds"] / totals["count"] * 1000, 1)}
+            for name, totals in sorted(_section_totals.items())
+        ]
+
+
+# ---------- PROMETHEUS TEXT FORMAT ----------
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", " ")
+
+
+def render_prometheus():
+    lines = []
+    with _lock:
+        lines += [
+            "# HELP dashboard_query_seconds Time spent in backend queries.",
+            "# TYPE dashboard_query_seconds summary",
+        ]
+        for (label, backend), totals in sorted(_query_totals.items()):
+            labels = f'query="{_escape(label)}",backend="{backend}"'
+            lines.append(f"dashboard_query_seconds_sum{{{labels}}} {totals['seconds']:.6f}")
+            lines.append(f"dashboard_query_seconds_count{{{labels}}} {totals['count']}")
+        for metric, field, help_text in [
+            ("dashboard_query_errors_total", "errors", "Failed backend queries."),
+            ("dashboard_query_rows_total", "rows", "Rows returned by backend queries."),
+            ("dashboard_query_bytes_total", "bytes", "In-memory size of query results."),
+        ]:
+            lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} counter"]
+            for (label, backend), totals in sorted(_query_totals.items()):
+                lines.append(f'{metric}{{query="{_escape(label)}",backend="{backend}"}} {totals[field]}')
+        lines += [
+            "# HELP dashboard_query_phase_seconds_total Time per query phase (connect, acquire, execute, fetch, frame).",
+            "# TYPE dashboard_query_phase_seconds_total counter",
+        ]
+        for (label, name), seconds in sorted(_phase_seconds.items()):
+            lines.append(f'dashboard_query_phase_seconds_total{{query="{_escape(label)}",phase="{name}"}} {seconds:.6f}')
+        lines += [
+            "# HELP dashboard_connect_seconds Snowflake login time.",
+            "# TYPE dashboard_connect_seconds summary",
+            f"dashboard_connect_seconds_sum {_connect['seconds']:.6f}",
+            f"dashboard_connect_seconds_count {_connect['count']}",
+            "# HELP dashboard_section_seconds Time spent rendering page sections.",
+            "# TYPE dashboard_section_seconds summary",
+        ]
+        for name, totals in sorted(_section_totals.items()):
+            lines.append(f'dashboard_section_seconds_sum{{section="{_escape(name)}"}} {totals["seconds"]:.6f}')
+            lines.append(f'dashboard_section_seconds_count{{section="{_escape(name)}"}} {totals["count"]}')
+    if "cache" in sys.modules:  # only once the app has loaded the data layer
+        stats = sys.modules["cache"].get_cache().stats()
+        lines += [
+            "# HELP dashboard_cache_lookups_total Shared query cache lookups by outcome.",
+            "# TYPE dashboard_cache_lookups_total counter",
+        ]
+        for outcome in ("hits", "stale_hits", "misses", "waits"):
+            lines.append(f'dashboard_cache_lookups_total{{outcome="{outcome}"}} {stats[outcome]}')
+        lines += [
+            "# HELP dashboard_cache_entries Entries in the shared query cache.",
+            "# TYPE dashboard_cache_entries gauge",
+            f"dashboard_cache_entries {stats['entries']}",
+        ]
+    return "\n".join(lines) + "\n"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render_prometheus().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_http_server():
+    """Serve /metrics on METRICS_HOST:METRICS_PORT, tried once per process (no-op when unset)."""
+    global _server, _server_attempted
+    port = os.environ.get("METRICS_PORT")
+    host = os.environ.get("METRICS_HOST", "127.0.0.1")
+    with _lock:
+        if _server_attempted or not port:
+            return
+        # every rerun calls this: a port in use (e.g. a second replica) is reported only once
+        _server_attempted = True
+        try:
+            _server = ThreadingHTTPServer((host, int(port)), _MetricsHandler)
+        except (OSError, ValueError) as err:
+            logger.error("Metrics endpoint on %s:%s not started: %s", host, port, err)
+            return
+    threading.Thread(target=_server.serve_forever, name="metrics-http", daemon=True).start()
+
+
+# ---------- SIDEBAR DEBUG PANEL ----------
+def debug_panel_enabled():
+    import streamlit as st
+
+    if os.environ.get("DEBUG_PANEL", "").lower() in ("1", "true", "yes"):
+        return True
+    return st.query_params.get("debug") == "1"
+
+
+def render_debug_panel():
+    import streamlit as st
+
+    with st.expander("Debug: Abfragen & Render-Zeiten"):
+        st.caption("Letzte Abfragen (neueste zuerst)")
+        st.dataframe(recent_events(), hide_index=True, use_container_width=True)
+        st.caption("Seitenabschnitte")
+        st.dataframe(section_summary(), hide_index=True, use_container_width=True)
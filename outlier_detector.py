@@ -0,0 +1,174 @@
+"""
+In-app attendance outlier detection over HISTORICAL_DATA and APPOINTMENT.
+
+An alternative to the external OUTLIER_DETECTION table for the "Daten Ausreißer gefunden"
+metric (OUTLIER_SOURCE=detector). Every resident and meal time is a series of daily
+attendance flags. An absence is an outlier when
+- it is unusual for that resident at that meal time: z-score against the rolling baseline of
+  the last OUTLIER_WINDOW days at or below -OUTLIER_Z (needs OUTLIER_MIN_HISTORY days), or
+- it extends a streak of OUTLIER_STREAK or more consecutive absences.
+Absences on a day with an appointment are excused: they are neither scored nor part of the
+baseline.
+
+All series are scored at once with NumPy. The detector keeps the last window of flags per
+series as state, so after the first (vectorized) bootstrap only new days are fetched and scored.
+"""
+import os
+import threading
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+
+import queries
+
+ENABLED = os.environ.get("OUTLIER_SOURCE", "summary").lower() == "detector"
+
+KEEP_DAYS = 7  # scored days kept for repeated lookups
+
+
+def prepare(df):
+    """DAY as date and PRESENT as 1.0 / 0.0, NaN for excused absences."""
+    present = df["PRESENT"].astype(float).to_numpy()
+    excused = (df["HAS_APPOINTMENT"].astype(int).to_numpy() == 1) & (present == 0)
+    return pd.DataFrame({
+        "PERSON_ID": df["PERSON_ID"].to_numpy(),
+        "EMPLOYEE": df["EMPLOYEE"].astype(object).to_numpy(),
+        "MEALTIME": df["MEALTIME"].astype(str).to_numpy(),
+        "DAY": pd.to_datetime(df["MEAL_DATE"]).dt.date.to_numpy(),
+        "PRESENT": np.where(excused, np.nan, present),
+    })
+
+
+class OutlierDetector:
+    def __init__(self, window=28, z_threshold=2.0, streak=3, min_history=7, std_floor=0.15):
+        self.window = window
+        self.z_threshold = z_threshold
+        self.streak = streak
+        self.min_history = min_history
+        self.std_floor = std_floor  # keeps a single absence of a resident who always came from scoring -inf
+        self.last_day = None
+        self._keys = {}  # (PERSON_ID, MEALTIME) -> row of the state arrays
+        self._flags = np.full((0, window), np.nan)  # ring buffer of the last `window` days per series
+        self._pos = 0  # column that the next day overwrites (the oldest)
+        self._streaks = np.zeros(0, dtype=np.int32)
+
+    def bootstrap(self, history):
+        """Initialise the state from prepared history (all days up to and including the last one)."""
+        days = sorted(history["DAY"].unique())[-self.window:]
+        if not days:
+            return
+        matrix = history[history["DAY"].isin(days)].pivot_table(
+            index=["PERSON_ID", "MEALTIME"], columns="DAY", values="PRESENT", aggfunc="max", dropna=False,
+        ).reindex(columns=days)
+        flags = matrix.to_numpy(dtype=float)
+        self._keys = {key: row for row, key in enumerate(matrix.index)}
+        self._flags = np.full((len(flags), self.window), np.nan)
+        self._flags[:, self.window - flags.shape[1]:] = flags
+        self._pos = 0
+        self._streaks = self._trailing_absences(self._flags)
+        self.last_day = days[-1]
+
+    @staticmethod
+    def _trailing_absences(flags):
+        """Absences after the last attended day of each row (days without a flag are skipped)."""
+        attended = flags == 1
+        absent_total = np.cumsum(flags == 0, axis=1)
+        columns = flags.shape[1]
+        last_attended = np.where(attended.any(axis=1), columns - 1 - np.argmax(attended[:, ::-1], axis=1), -1)
+        before = np.where(last_attended >= 0, absent_total[np.arange(len(flags)), np.maximum(last_attended, 0)], 0)
+        return (absent_total[:, -1] - before).astype(np.int32)
+
+    def _rows(self, day):
+        keys = list(zip(day["PERSON_ID"], day["MEALTIME"]))
+        new = [key for key in dict.fromkeys(keys) if key not in self._keys]
+        if new:
+            for key in new:
+                self._keys[key] = len(self._keys)
+            self._flags = np.vstack([self._flags, np.full((len(new), self.window), np.nan)])
+            self._streaks = np.concatenate([self._streaks, np.zeros(len(new), dtype=np.int32)])
+        return np.fromiter((self._keys[key] for key in keys), dtype=np.intp, count=len(keys))
+
+    def score(self, day):
+        """
+        Score one day (prepared rows of a single DAY) against the state and add it to the state.
+        Returns the rows with Z, STREAK and OUTLIER columns.
+        """
+        rows = self._rows(day)
+        baseline = self._flags[rows]
+        count = (~np.isnan(baseline)).sum(axis=1)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = np.nansum(baseline, axis=1) / count
+            std = np.sqrt(np.maximum(np.nansum(baseline ** 2, axis=1) / count - mean ** 2, 0))
+            present = day["PRESENT"].to_numpy(dtype=float)
+            z = (present - mean) / np.maximum(std, self.std_floor)
+        absent = present == 0
+        streaks = np.where(absent, self._streaks[rows] + 1, np.where(present == 1, 0, self._streaks[rows]))
+        unusual = (count >= self.min_history) & (z <= -self.z_threshold)
+        outlier = absent & (unusual | (streaks >= self.streak))
+
+        column = np.full(len(self._flags), np.nan)
+        column[rows] = present
+        self._flags[:, self._pos] = column
+        self._pos = (self._pos + 1) % self.window
+        self._streaks[rows] = streaks
+        self.last_day = day["DAY"].iloc[0] if len(day) else self.last_day
+        return day.assign(Z=z, STREAK=streaks, OUTLIER=outlier)
+
+
+_detector = None
+_scores = {}  # day -> scored rows
+_lock = threading.Lock()
+
+
+def new_detector():
+    """A fresh detector with the OUTLIER_* settings; scored_day keeps the one in use."""
+    return OutlierDetector(
+        window=int(os.environ.get("OUTLIER_WINDOW", 28)),
+        z_threshold=float(os.environ.get("OUTLIER_Z", 2.0)),
+        streak=int(os.environ.get("OUTLIER_STREAK", 3)),
+        min_history=int(os.environ.get("OUTLIER_MIN_HISTORY", 7)),
+    )
+
+
+def _fetch(start, end):
+    # straight from the warehouse: scored_day scores a day once and keeps the result in _scores
+    return prepare(queries.fetch("attendance_history", start=start, day=end))
+
+
+def scored_day(**params):
+    """Scored rows of the dashboard day; only days after the detector's last one are fetched."""
+    global _detector
+    day = queries.dashboard_params(**params)["day"]
+    with _lock:
+        if day in _scores:
+            return _scores[day]
+        if _detector is None or _detector.last_day is None or _detector.last_day >= day:
+            # first run (or a day before the state): bootstrap from the window before the day
+            detector = new_detector()
+            history = _fetch(day - timedelta(days=detector.window), day)
+            detector.bootstrap(history[history["DAY"] < day])
+            _detector = detector
+            new_days = history[history["DAY"] == day]
+        else:
+            new_days = _fetch(_detector.last_day + timedelta(days=1), day)
+        for current, rows in new_days.groupby("DAY", sort=True):
+            _scores[current] = _detector.score(rows.reset_index(drop=True))
+        _scores.setdefault(day, new_days.assign(Z=np.nan, STREAK=0, OUTLIER=False))
+        for old in sorted(_scores)[:-KEEP_DAYS]:
+            del _scores[old]
+        return _scores[day]
+
+
+def outlier_count(**params):
+    """Outliers of the dashboard day, without the excluded meal time (like the "outlier_count" query)."""
+    params = queries.dashboard_params(**params)
+    scored = scored_day(**params)
+    return int((scored["OUTLIER"] & (scored["MEALTIME"] != params["excluded_mealtime"])).sum())
+
+
+def reset():
+    global _detector
+    with _lock:
+        _detector = None
+        _scores.clear()
@@ -0,0 +1,105 @@
+"""
+Incrementally maintained per-day, per-caretaker outlier counts.
+
+The "Daten Ausreißer gefunden" metric used to run a 5-way join over OUTLIER_DETECTION,
+PERSON, HISTORICAL_DATA, APPOINTMENT and MEALPLAN on every session. That join now runs here,
+only for days at or after the summary's watermark (its latest DAY; the last day is redone to
+pick up late rows), and the dashboard reads OUTLIER_DAILY_SUMMARY with a point lookup
+(queries.py, "outlier_count").
+
+Run after the nightly outlier job:  python outlier_summary.py
+"""
+import logging
+from datetime import date
+
+from dotenv import load_dotenv
+
+from db import get_pool, invalidate_matching
+
+logger = logging.getLogger("outlier_summary")
+
+SUMMARY_TABLE = "OUTLIER_DAILY_SUMMARY"
+
+CREATE_SQL = f"""CREATE TABLE IF NOT EXISTS {SUMMARY_TABLE} (
+    DAY DATE NOT NULL,
+    EMPLOYEE VARCHAR,
+    MEALTIME VARCHAR,
+    OUTLIER_COUNT NUMBER NOT NULL,
+    REFRESHED_AT TIMESTAMP_NTZ DEFAULT CURRENT_TIMESTAMP()
+)"""
+
+# columns added after the table was first created, as (name, type). Rows written before a column
+# existed were aggregated without it, so adding one also empties the summary for a full rebuild.
+ADDED_COLUMNS = [("MEALTIME", "VARCHAR")]
+
+WATERMARK_SQL = f"SELECT MAX(DAY) FROM {SUMMARY_TABLE}"
+
+DELETE_SQL = f"DELETE FROM {SUMMARY_TABLE} WHERE DAY >= ?"
+
+# same join and filters as the former live metric query, grouped by day, caretaker and meal time
+# (the meal time filter is applied by the dashboard lookup, see queries.py)
+INSERT_SQL = f"""INSERT INTO {SUMMARY_TABLE} (DAY, EMPLOYEE, MEALTIME, OUTLIER_COUNT)
+    SELECT
+    od.DATE_,
+    p.EMPLOYEE,
+    MEALTIME,
+    COUNT(PERSON_ID)
+    FROM OUTLIER_DETECTION od
+    JOIN PERSON p USING(od.person_id)
+    JOIN HISTORICAL_DATA HD  ON HD.PERSON_ID = p.person_id AND HD.MEAL_DATE = od.DATE_
+    JOIN APPOINTMENT A ON HD.MEAL_DATE = A.TIME_STAMP AND  P.PERSON_ID = A.PERSON_ID
+    JOIN MEALPLAN MP USING(HD.MEALPLAN_ID, HD.MEAL_DATE)
+    WHERE
+    od.DATE_ >= ?
+    AND APPEARED = 'No'
+    GROUP BY od.DATE_, p.EMPLOYEE, MEALTIME"""
+
+# lower bound for the first refresh of an empty summary
+EPOCH = date(1900, 1, 1)
+
+
+def migrate(cur):
+    """Bring a summary table created by an older version up to CREATE_SQL's columns."""
+    cur.execute(f"SELECT * FROM {SUMMARY_TABLE} LIMIT 0")
+    existing = {desc[0].upper() for desc in cur.description}
+    missing = [(name, column_type) for name, column_type in ADDED_COLUMNS if name not in existing]
+    if not missing:
+        return
+    # emptied first: if the ALTER fails, the next run still sees the column missing and retries
+    cur.execute(f"DELETE FROM {SUMMARY_TABLE}")
+    for name, column_type in missing:
+        logger.info("Adding column %s to %s", name, SUMMARY_TABLE)
+        cur.execute(f"ALTER TABLE {SUMMARY_TABLE} ADD COLUMN {name} {column_type}")
+
+
+def refresh():
+    """Recompute the summary for days at or after the watermark. Returns the number of rows written."""
+    with get_pool().connection() as conn:
+        cur = conn.cursor()
+        try:
+            cur.execute(CREATE_SQL)
+            migrate(cur)
+            cur.execute(WATERMARK_SQL)
+            watermark = cur.fetchone()[0]
+            cur.execute("BEGIN")
+            if watermark is not None:
+                cur.execute(DELETE_SQL, (watermark,))
+            cur.execute(INSERT_SQL, (watermark or EPOCH,))
+            inserted = cur.rowcount
+            cur.execute("COMMIT")
+        except Exception:
+            try:
+                cur.execute("ROLLBACK")
+            except Exception:
+                # e.g. the connection is gone; the original error is the one to report
+                logger.exception("ROLLBACK of the %s refresh failed", SUMMARY_TABLE)
+            raise
+        finally:
+            cur.close()
+    invalidate_matching(SUMMARY_TABLE)
+    return inserted
+
+
+if __name__ == "__main__":
+    load_dotenv()
+    print(f"{SUMMARY_TABLE}: {refresh()} rows refreshed")
@@ -0,0 +1,96 @@
+"""
+Opt-in measurement of the bytes Streamlit sends to the browser per interaction.
+
+With PAYLOAD_LOG=1 every ForwardMsg enqueued by a script run is counted per session, and each
+full run (app.py) and each fragment rerun logs its payload, e.g.
+
+    payload page=Pflege Dashboard scope=app bytes=48211
+    payload page=Bewohner Dashboard scope=fragment:calendar_card bytes=5120
+
+This hooks into Streamlit internals and is meant for measuring, not for production.
+"""
+import os
+import logging
+import threading
+from functools import wraps
+
+logger = logging.getLogger("payload")
+
+ENABLED = os.environ.get("PAYLOAD_LOG", "").lower() in ("1", "true", "yes")
+
+_sent = {}  # session id -> bytes enqueued so far
+_sent_lock = threading.Lock()
+_installed = False
+
+
+def _script_run_context():
+    try:
+        from streamlit.runtime.scriptrunner_utils import script_run_context
+    except ImportError:  # streamlit < 1.38
+        from streamlit.runtime.scriptrunner import script_run_context
+    return script_run_context
+
+
+def install():
+    global _installed
+    if not ENABLED or _installed:
+        return
+    ctx_module = _script_run_context()
+    original_enqueue = ctx_module.ScriptRunContext.enqueue
+
+    def enqueue(self, msg):
+        with _sent_lock:
+            _sent[self.session_id] = _sent.get(self.session_id, 0) + msg.ByteSize()
+        return original_enqueue(self, msg)
+
+    ctx_module.ScriptRunContext.enqueue = enqueue
+    if not logger.handlers:
+        logger.addHandler(logging.StreamHandler())
+    logger.setLevel(logging.INFO)
+    _installed = True
+
+
+def bytes_sent():
+    ctx = _script_run_context().get_script_run_ctx()
+    if ctx is None:
+        return 0
+    with _sent_lock:
+        return _sent.get(ctx.session_id, 0)
+
+
+def _forget_closed_sessions():
+    from streamlit.runtime import Runtime
+
+    if not Runtime.exists():
+        return
+    runtime = Runtime.instance()
+    with _sent_lock:
+        for session_id in [session_id for session_id in _sent if not runtime.is_active_session(session_id)]:
+            del _sent[session_id]
+
+
+def log(scope, start, page=None):
+    if ENABLED:
+        logger.info("payload page=%s scope=%s bytes=%d", page, scope, bytes_sent() - start)
+        if scope == "app":
+            # once per full run: the counters of sessions that have gone would otherwise stay
+            _forget_closed_sessions()
+
+
+def measured(name):
+    """Log the payload of each run of a fragment. Apply below @st.fragment."""
+    def decorator(func):
+        if not ENABLED:
+            return func
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            import streamlit as st
+
+            start = bytes_sent()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                log("fragment:" + name, start, st.session_state.get("page"))
+        return wrapper
+    return decorator
@@ -0,0 +1,62 @@
+"""
+Per-caretaker dashboard metrics for all caretakers from one grouped query.
+
+With PREFETCH_CARETAKERS=1 the "In Pflege heute" and "Daten Ausreißer gefunden" cards and the
+attendance chart are answered from an in-memory index keyed by EMPLOYEE, built from a single
+"caretaker_metrics" query per day, instead of one query per caretaker and session.
+"""
+import os
+import threading
+from collections import namedtuple
+
+import queries
+
+ENABLED = os.environ.get("PREFETCH_CARETAKERS", "").lower() in ("1", "true", "yes")
+
+CaretakerMetrics = namedtuple("CaretakerMetrics", "in_care outliers appeared_yes appeared_no")
+EMPTY = CaretakerMetrics(0, 0, 0, 0)
+
+_indexes = {}  # day -> (source DataFrame, {employee: CaretakerMetrics})
+_indexes_lock = threading.Lock()
+
+
+def build_index(df):
+    totals = df.groupby("EMPLOYEE", dropna=False, observed=True)[
+        ["IN_CARE", "OUTLIERS", "APPEARED_YES", "APPEARED_NO"]
+    ].sum()
+    return {
+        employee: CaretakerMetrics(*(int(value) for value in row))
+        for employee, row in zip(totals.index, totals.itertuples(index=False))
+    }
+
+
+def get_index(**params):
+    """{employee: CaretakerMetrics} for the day; rebuilt only when the cached query result changes."""
+    day = queries.dashboard_params(**params)["day"]
+    df = queries.run("caretaker_metrics", **params)
+    with _indexes_lock:
+        cached = _indexes.get(day)
+        if cached is not None and cached[0] is df:
+            return cached[1]
+    index = build_index(df)
+    with _indexes_lock:
+        _indexes[day] = (df, index)
+        # only the current and previous day are ever looked up
+        for old_day in sorted(_indexes)[:-2]:
+            del _indexes[old_day]
+    return index
+
+
+def caretaker_metrics(caretaker=None, **params):
+    caretaker = caretaker or queries.dashboard_params(**params)["caretaker"]
+    return get_index(**params).get(caretaker, EMPTY)
+
+
+def facility_metrics(**params):
+    """Sum over all caretakers, including residents without one."""
+    return CaretakerMetrics(*(sum(column) for column in zip(EMPTY, *get_index(**params).values())))
+
+
+def reset():
+    with _indexes_lock:
+        _indexes.clear()
@@ -0,0 +1,152 @@
+"""
+In-process scheduler that pre-warms the shared query cache.
+
+At each time in PREWARM_TIMES (local "HH:MM", comma separated; default after the nightly
+outlier/forecast jobs and before the morning shift) and once at startup, the dashboard's
+datasets are queried and stored in the shared cache. Pre-warmed entries may be served stale
+for a whole day while a background refresh runs, so user-facing reruns do not block on
+Snowflake between scheduled runs.
+"""
+import os
+import logging
+import threading
+from datetime import datetime, timedelta
+from functools import partial
+
+logger = logging.getLogger("prewarm")
+
+DEFAULT_TIMES = "02:30,05:45"
+STALE_TTL = 24 * 3600
+
+_state = {"last_run": None, "last_error": None}
+_state_lock = threading.Lock()
+_thread = None
+_stop = threading.Event()
+
+
+def parse_times(value):
+    """Sorted (hour, minute) pairs; invalid entries are logged and left out."""
+    times = []
+    for item in value.split(","):
+        if not item.strip():
+            continue
+        try:
+            hour, minute = (int(part) for part in item.split(":"))
+            if not (0 <= hour < 24 and 0 <= minute < 60):
+                raise ValueError
+        except ValueError:
+            logger.warning("Ignoring invalid PREWARM_TIMES entry %r", item.strip())
+            continue
+        times.append((hour, minute))
+    return sorted(times)
+
+
+def next_run(now, times):
+    for day_offset in (0, 1):
+        day = now.date() + timedelta(days=day_offset)
+        for hour, minute in times:
+            candidate = datetime(day.year, day.month, day.day, hour, minute)
+            if candidate > now:
+                return candidate
+    return None
+
+
+def warm_all():
+    """Warm every dataset the enabled modes read. Returns (warmed, failed) step names."""
+    # imported here so that starting the scheduler does not load Snowflake/pandas into the app shell
+    import attendance_trends
+    import forecast
+    import outlier_detector
+    import prefetch
+    import queries
+    import report_pages
+    import resident_week
+
+    steps = []
+    if os.environ.get("PREWARM_REFRESH_SUMMARY", "").lower() in ("1", "true", "yes"):
+        # needs write access; otherwise run outlier_summary.py after the nightly job
+        import outlier_summary
+
+        steps.append(("outlier_summary", outlier_summary.refresh))
+
+    # the same sources as the Pflege cards (see views/pflege.py)
+    if prefetch.ENABLED:
+        names = ["caretaker_metrics"]
+    else:
+        names = ["count_in_care", "attendance"]
+        if not outlier_detector.ENABLED:
+            names.append("outlier_count")
+    for name in names:
+        steps.append((name, partial(queries.warm, name, stale_ttl=STALE_TTL)))
+    if outlier_detector.ENABLED:
+        steps.append(("outlier_detector", outlier_detector.scored_day))
+    if forecast.ENABLED:
+        steps.append(("forecast", forecast.weekly_forecast))
+    if resident_week.ENABLED:
+        steps.append(("resident_week", resident_week.get_week))
+    steps.append(("attendance_trends", lambda: attendance_trends.get_cache().table(queries.dashboard_params()["day"])))
+    for report_type in ("outlier", "forecast"):
+        steps.append(("report_version:" + report_type, partial(queries.warm, "report_version", stale_ttl=STALE_TTL, report_type=report_type)))
+        steps.append(("report_pages:" + report_type, partial(report_pages.get_report_pages, report_type)))
+
+    warmed, failed = [], []
+    for name, step in steps:
+        try:
+            step()
+        except Exception:
+            logger.exception("Pre-warming %s failed", name)
+            failed.append(name)
+        else:
+            warmed.append(name)
+    return warmed, failed
+
+
+def run_once():
+    warmed, failed = warm_all()
+    with _state_lock:
+        # a run in which nothing could be warmed leaves the previous time
+        if warmed:
+            _state["last_run"] = datetime.now()
+        _state["last_error"] = f"{datetime.now():%H:%M}: {', '.join(failed)} failed" if failed else None
+    return not failed
+
+
+def _loop(times, on_start):
+    import snapshot
+
+    # a snapshot bundle already answers the first loads; the scheduled runs bring fresh data
+    if on_start and snapshot.open_current() is None:
+        run_once()
+    while not _stop.is_set():
+        due = next_run(datetime.now(), times)
+        if due is None or _stop.wait((due - datetime.now()).total_seconds()):
+            return
+        run_once()
+
+
+def start():
+    """Start the scheduler once per process; later calls (every rerun) do nothing."""
+    global _thread
+    if os.environ.get("PREWARM_ENABLED", "1").lower() in ("0", "false", "no"):
+        return
+    with _state_lock:
+        if _thread is not None:
+            return
+        times = parse_times(os.environ.get("PREWARM_TIMES", DEFAULT_TIMES))
+        on_start = os.environ.get("PREWARM_ON_START", "1").lower() not in ("0", "false", "no")
+        _thread = threading.Thread(target=_loop, args=(times, on_start), name="prewarm", daemon=True)
+        _thread.start()
+
+
+def stop():
+    _stop.set()
+
+
+def last_run():
+    with _state_lock:
+        return _state["last_run"]
+
+
+def last_error():
+    with _state_lock:
+        return _state["last_error"]
@@ -0,0 +1,231 @@
+"""
+Named, parameterized dashboard queries.
+
+SQL is written with :name placeholders and compiled once to qmark (?) bind variables, which
+Snowflake binds server side. The statement text therefore stays identical for every reference
+date and caretaker: it reuses compiled plans and the warehouse result cache, and the app-side
+cache keys on that text plus the bound values.
+"""
+import os
+import re
+from datetime import date, timedelta
+
+import instrumentation
+from db import get_context_data, refresh_context_data, run_query
+from outlier_summary import SUMMARY_TABLE
+
+# Cache lifetimes (seconds) for the shared query cache
+TTL_DAILY = int(os.environ.get("CACHE_TTL_DAILY", 3600))    # counts and aggregates that change once per day
+TTL_REPORT = int(os.environ.get("CACHE_TTL_REPORT", 600))   # version checks of the generated reports
+TTL_WEEK = int(os.environ.get("CACHE_TTL_WEEK", 300))       # version check of the week's meal plan and appointments
+
+# Column that orders reports by age (e.g. CREATED_AT); set it when OPENAI_REPORT keeps more than
+# one report per type. Without it the choice is only made deterministic (by hash), not "newest".
+REPORT_ORDER_COLUMN = os.environ.get("REPORT_ORDER_COLUMN")
+_REPORT_ORDER_BY = f"ORDER BY {REPORT_ORDER_COLUMN} DESC, HASH(REPORT)" if REPORT_ORDER_COLUMN else "ORDER BY HASH(REPORT)"
+
+_PLACEHOLDER = re.compile(r"(?<!:):([A-Za-z_]\w*)")
+
+
+class Query:
+    def __init__(self, name, sql, ttl):
+        self.name = name
+        self.param_names = _PLACEHOLDER.findall(sql)
+        self.sql = _PLACEHOLDER.sub("?", sql)
+        self.ttl = ttl
+
+    def bind(self, params):
+        return tuple(params[name] for name in self.param_names)
+
+
+QUERIES = {}
+
+
+def define(name, sql, ttl=TTL_DAILY):
+    QUERIES[name] = Query(name, sql, ttl)
+    instrumentation.register_label(QUERIES[name].sql, name)
+    return QUERIES[name]
+
+
+def dashboard_params(**overrides):
+    """
+    Default parameters of the dashboard queries. The reference date is DASHBOARD_DATE (ISO) or
+    today; `day` is the day before it, the most recent day with complete data.
+    """
+    reference_date = overrides.get("reference_date")
+    if reference_date is None:
+        configured = os.environ.get("DASHBOARD_DATE")
+        reference_date = date.fromisoformat(configured) if configured else date.today()
+    params = {
+        "reference_date": reference_date,
+        "day": reference_date - timedelta(days=1),
+        "caretaker": os.environ.get("DASHBOARD_CARETAKER", "Employee A"),
+        "excluded_mealtime": "breakfast",
+    }
+    params.update(overrides)
+    return params
+
+
+def run(name, **params):
+    """Cached result of a named query; missing parameters come from dashboard_params()."""
+    query = QUERIES[name]
+    return get_context_data(query.sql, query.bind(dashboard_params(**params)), ttl=query.ttl)
+
+
+def warm(name, stale_ttl=None, **params):
+    """Run a named query now and replace its cache entry (see prewarm.py)."""
+    query = QUERIES[name]
+    return refresh_context_data(query.sql, query.bind(dashboard_params(**params)), ttl=query.ttl, stale_ttl=stale_ttl)
+
+
+def fetch(name, **params):
+    """Like run(), but always reads from the warehouse (for results cached elsewhere)."""
+    query = QUERIES[name]
+    return run_query(query.sql, query.bind(dashboard_params(**params)))
+
+
+# ---------- DASHBOARD QUERIES ----------
+define("count_in_care", """SELECT COUNT(PERSON_ID) AS COUNT
+    FROM PERSON
+    WHERE EMPLOYEE = :caretaker""")
+
+# precomputed per-day summary, see outlier_summary.py
+define("outlier_count", f"""SELECT COALESCE(SUM(OUTLIER_COUNT), 0) AS OUTLIER_COUNT
+    FROM {SUMMARY_TABLE}
+    WHERE DAY = :day
+    AND MEALTIME != :excluded_mealtime""")
+
+define("attendance", """SELECT
+    MEAL_DATE,
+    APPEARED,
+    COUNT(PERSON_ID) AS COUNT
+    FROM HISTORICAL_DATA
+    WHERE MEAL_DATE = :day
+    GROUP BY APPEARED, MEAL_DATE""")
+
+# all caretakers at once for prefetch mode (see prefetch.py): care count, outliers and
+# attendance split per EMPLOYEE; rows with a NULL EMPLOYEE are summed by the index
+define("caretaker_metrics", f"""WITH care AS (
+        SELECT EMPLOYEE, COUNT(PERSON_ID) AS IN_CARE
+        FROM PERSON
+        GROUP BY EMPLOYEE
+    ),
+    outliers AS (
+        SELECT EMPLOYEE, SUM(OUTLIER_COUNT) AS OUTLIERS
+        FROM {SUMMARY_TABLE}
+        WHERE DAY = :day
+        AND MEALTIME != :excluded_mealtime
+        GROUP BY EMPLOYEE
+    ),
+    attendance AS (
+        SELECT
+        p.EMPLOYEE,
+        SUM(CASE WHEN hd.APPEARED = 'Yes' THEN 1 ELSE 0 END) AS APPEARED_YES,
+        SUM(CASE WHEN hd.APPEARED = 'No' THEN 1 ELSE 0 END) AS APPEARED_NO
+        FROM HISTORICAL_DATA hd
+        LEFT JOIN PERSON p ON p.PERSON_ID = hd.PERSON_ID
+        WHERE hd.MEAL_DATE = :day
+        GROUP BY p.EMPLOYEE
+    )
+    SELECT EMPLOYEE, IN_CARE, 0 AS OUTLIERS, 0 AS APPEARED_YES, 0 AS APPEARED_NO FROM care
+    UNION ALL
+    SELECT EMPLOYEE, 0, OUTLIERS, 0, 0 FROM outliers
+    UNION ALL
+    SELECT EMPLOYEE, 0, 0, APPEARED_YES, APPEARED_NO FROM attendance""")
+
+# per resident, meal time and day: attended (1/0) and whether there was an appointment that day
+# (in-app outlier detection, see outlier_detector.py)
+define("attendance_history", """SELECT
+    hd.PERSON_ID,
+    p.EMPLOYEE,
+    hd.MEAL_DATE,
+    mp.MEALTIME,
+    CASE WHEN hd.APPEARED = 'Yes' THEN 1 ELSE 0 END AS PRESENT,
+    CASE WHEN a.PERSON_ID IS NULL THEN 0 ELSE 1 END AS HAS_APPOINTMENT
+    FROM HISTORICAL_DATA hd
+    JOIN MEALPLAN mp ON mp.MEALPLAN_ID = hd.MEALPLAN_ID
+    LEFT JOIN PERSON p ON p.PERSON_ID = hd.PERSON_ID
+    LEFT JOIN (SELECT DISTINCT PERSON_ID, TIME_STAMP FROM APPOINTMENT) a
+        ON a.PERSON_ID = hd.PERSON_ID AND a.TIME_STAMP = hd.MEAL_DATE
+    WHERE hd.MEAL_DATE >= :start
+    AND hd.MEAL_DATE <= :day""")
+
+# attendance per resident, meal time and day with the dish served (local forecast, see forecast.py)
+define("meal_attendance", """SELECT
+    hd.PERSON_ID,
+    hd.MEAL_DATE,
+    mp.MEALTIME,
+    mp.MEAL,
+    CASE WHEN hd.APPEARED = 'Yes' THEN 1 ELSE 0 END AS PRESENT
+    FROM HISTORICAL_DATA hd
+    JOIN MEALPLAN mp ON mp.MEALPLAN_ID = hd.MEALPLAN_ID
+    WHERE hd.MEAL_DATE >= :start
+    AND hd.MEAL_DATE <= :day""")
+
+define("mealplan_range", """SELECT MEAL_DATE, MEALTIME, MEAL
+    FROM MEALPLAN
+    WHERE MEAL_DATE >= :start
+    AND MEAL_DATE <= :day
+    ORDER BY MEAL_DATE""")
+
+# one resident's appointments in a date range (calendar, see appointments.py)
+define("appointments_range", """SELECT TIME_STAMP, DESCRIPTION
+    FROM APPOINTMENT
+    WHERE PERSON_ID = :resident
+    AND TIME_STAMP >= :start
+    AND TIME_STAMP < :end
+    ORDER BY TIME_STAMP""")
+
+# meal plan and all residents' appointments of a week in one result (see resident_week.py);
+# KIND is 'meal' (LABEL = MEALTIME) or 'appointment' (PERSON_ID set)
+define("week_bulk", """SELECT 'meal' AS KIND, NULL AS PERSON_ID, MEAL_DATE AS TIME_STAMP, MEALTIME AS LABEL, MEAL AS TEXT
+    FROM MEALPLAN
+    WHERE MEAL_DATE >= :start
+    AND MEAL_DATE < :end
+    UNION ALL
+    SELECT 'appointment', PERSON_ID, TIME_STAMP, NULL, DESCRIPTION
+    FROM APPOINTMENT
+    WHERE TIME_STAMP >= :start
+    AND TIME_STAMP < :end""")
+
+# changes whenever a row of the week is added, removed or edited: the bulk query only reruns then
+define("week_version", """SELECT COUNT(*) AS ROW_COUNT, COALESCE(SUM(ROW_HASH), 0) AS CHECKSUM
+    FROM (
+        SELECT HASH(MEAL_DATE, MEALTIME, MEAL) AS ROW_HASH
+        FROM MEALPLAN
+        WHERE MEAL_DATE >= :start
+        AND MEAL_DATE < :end
+        UNION ALL
+        SELECT HASH(PERSON_ID, TIME_STAMP, DESCRIPTION)
+        FROM APPOINTMENT
+        WHERE TIME_STAMP >= :start
+        AND TIME_STAMP < :end
+    ) week_rows""", ttl=TTL_WEEK)
+
+# day-level attendance per meal time and caretaker, aggregated in the warehouse (see attendance_trends.py)
+define("daily_attendance", """SELECT
+    hd.MEAL_DATE,
+    mp.MEALTIME,
+    p.EMPLOYEE,
+    SUM(CASE WHEN hd.APPEARED = 'Yes' THEN 1 ELSE 0 END) AS APPEARED_YES,
+    COUNT(*) AS MEALS
+    FROM HISTORICAL_DATA hd
+    JOIN MEALPLAN mp ON mp.MEALPLAN_ID = hd.MEALPLAN_ID
+    LEFT JOIN PERSON p ON p.PERSON_ID = hd.PERSON_ID
+    WHERE hd.MEAL_DATE >= :start
+    AND hd.MEAL_DATE <= :day
+    GROUP BY hd.MEAL_DATE, mp.MEALTIME, p.EMPLOYEE""")
+
+# HASH(REPORT) serves as the report version: the check ships a single number instead of the HTML
+define("report_version", f"""SELECT HASH(REPORT) AS VERSION
+    FROM openai_report
+    WHERE REPORT_TYPE = :report_type
+    {_REPORT_ORDER_BY}
+    LIMIT 1""", ttl=TTL_REPORT)
+
+# the HTML of exactly the version the check returned, so the two can never disagree
+define("report_by_version", """SELECT HASH(REPORT) AS VERSION, REPORT
+    FROM openai_report
+    WHERE REPORT_TYPE = :report_type
+    AND HASH(REPORT) = :version
+    LIMIT 1""", ttl=TTL_REPORT)
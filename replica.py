@@ -0,0 +1,146 @@
+"""
+Local DuckDB read replica of the dashboard tables.
+
+The app reads from it when DATA_BACKEND is "replica" (Snowflake only on a miss) or "local"
+(replica only, no credentials needed). A query is a miss when it references a table the
+replica does not hold or DuckDB cannot run it, e.g. because of Snowflake-only syntax.
+
+Sync incrementally from Snowflake (e.g. every few minutes from cron):
+
+    python replica.py [path]
+
+Tables with a watermark column only fetch rows at or after the replica's latest value (the
+last value is replaced to pick up late rows); the others are copied in full. Appointments
+and meal plans are entered ahead of their date and changed later, so their date is no
+watermark and they are copied in full as well. The sync writes to a copy of the file and
+swaps it in atomically, so readers never see a half-synced replica.
+"""
+import os
+import re
+import sys
+import shutil
+import threading
+
+import duckdb
+from dotenv import load_dotenv
+
+REPLICA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "replica.duckdb")
+
+# table -> watermark column (None: full copy on every sync)
+TABLES = {
+    "PERSON": None,
+    "HISTORICAL_DATA": "MEAL_DATE",
+    "OUTLIER_DETECTION": "DATE_",
+    # future dates, no load timestamp: a watermark would skip later inserts, changes and deletes
+    "APPOINTMENT": None,
+    "MEALPLAN": None,
+    "OPENAI_REPORT": None,
+    "OUTLIER_DAILY_SUMMARY": "DAY",
+}
+
+_TABLE_REF = re.compile(r"\b(?:FROM|JOIN)\s+([A-Za-z_][\w.]*)", re.IGNORECASE)
+_CTE_NAME = re.compile(r"(?:\bWITH|,)\s*([A-Za-z_]\w*)\s+AS\s*\(", re.IGNORECASE)
+
+
+def referenced_tables(query):
+    ctes = {name.upper() for name in _CTE_NAME.findall(query)}
+    return {name.upper().split(".")[-1] for name in _TABLE_REF.findall(query)} - ctes
+
+
+class ReplicaBackend:
+    """Read-only access to the replica file; reopens it when a sync has swapped in a new one."""
+
+    def __init__(self, path=REPLICA_PATH):
+        self._path = path
+        self._lock = threading.Lock()
+        self._conn = None
+        self._tables = frozenset()
+        self._stamp = None
+
+    def _connection(self):
+        try:
+            stat = os.stat(self._path)
+        except FileNotFoundError:
+            return None, frozenset()
+        stamp = (stat.st_ino, stat.st_mtime_ns)
+        with self._lock:
+            if stamp != self._stamp:
+                # the previous connection is left to the garbage collector: cursors may still use it
+                self._conn = duckdb.connect(self._path, read_only=True)
+                rows = self._conn.execute("SELECT table_name FROM information_schema.tables").fetchall()
+                self._tables = frozenset(name.upper() for (name,) in rows)
+                self._stamp = stamp
+            return self._conn, self._tables
+
+    def tables(self):
+        return self._connection()[1]
+
+    def query(self, query, params=None):
+        """DataFrame for the query, or None on a miss."""
+        from db import arrow_to_frame
+
+        conn, tables = self._connection()
+        if conn is None or not referenced_tables(query) <= tables:
+            return None
+        cur = conn.cursor()
+        try:
+            table = cur.execute(query, list(params or ())).fetch_arrow_table()
+        except duckdb.Error:
+            return None
+        finally:
+            cur.close()
+        return arrow_to_frame(table)
+
+
+def _fetch_remote(cur, query, params=()):
+    cur.execute(query, params)
+    # an empty result is still a table, so a full copy can empty the local one
+    return cur.fetch_arrow_all(force_return_table=True)
+
+
+def sync(path=REPLICA_PATH, tables=TABLES):
+    """Bring the replica up to date with Snowflake. Returns {table: rows fetched}."""
+    from db import get_pool
+
+    work_path = path + ".sync"
+    if os.path.exists(path):
+        shutil.copyfile(path, work_path)
+    elif os.path.exists(work_path):
+        os.remove(work_path)
+
+    fetched = {}
+    local = duckdb.connect(work_path)
+    try:
+        existing = {name.upper() for (name,) in local.execute("SELECT table_name FROM information_schema.tables").fetchall()}
+        with get_pool().connection() as conn:
+            cur = conn.cursor()
+            for table, watermark_column in tables.items():
+                watermark = None
+                if watermark_column and table in existing:
+                    watermark = local.execute(f"SELECT MAX({watermark_column}) FROM {table}").fetchone()[0]
+                if watermark is None:
+                    incoming = _fetch_remote(cur, f"SELECT * FROM {table}")
+                    local.register("incoming", incoming)
+                    local.execute(f"CREATE OR REPLACE TABLE {table} AS SELECT * FROM incoming")
+                else:
+                    incoming = _fetch_remote(cur, f"SELECT * FROM {table} WHERE {watermark_column} >= ?", (watermark,))
+                    local.register("incoming", incoming)
+                    local.execute("BEGIN")
+                    local.execute(f"DELETE FROM {table} WHERE {watermark_column} >= ?", [watermark])
+                    local.execute(f"INSERT INTO {table} SELECT * FROM incoming")
+                    local.execute("COMMIT")
+                local.unregister("incoming")
+                fetched[table] = incoming.num_rows
+            cur.close()
+        local.execute("CHECKPOINT")
+    finally:
+        local.close()
+    os.replace(work_path, path)
+    return fetched
+
+
+if __name__ == "__main__":
+    load_dotenv()
+    target = sys.argv[1] if len(sys.argv) > 1 else os.environ.get("REPLICA_PATH", REPLICA_PATH)
+    for table, rows in sync(target).items():
+        print(f"{table}: {rows} rows")
@@ -0,0 +1,194 @@
+"""
+Stored report HTML split into sections for the paginated report viewer.
+
+A report is parsed once per version: scripts, embedded frames/objects, event handler
+attributes and javascript: URLs are dropped, <style> blocks are kept as a shared head, and the
+body is split before every heading of the top level used more than once (e.g. each <h2> of a
+report with a single <h1>). Tags open at a split are closed at the end of the section and
+reopened at the start of the next, so each section is a well-formed document on its own.
+The viewer then sends only the selected section to the browser.
+"""
+import re
+import threading
+from collections import namedtuple
+from html import escape, unescape
+from html.parser import HTMLParser
+
+import reports
+
+DROPPED = {"script", "iframe", "object", "embed", "frame", "frameset", "base", "meta"}
+# elements without an end tag; a dropped one must not count towards the dropped depth
+VOID = {"area", "base", "br", "col", "embed", "frame", "hr", "img", "input", "keygen", "link", "meta", "param", "source", "track", "wbr"}
+# skipped without their content; the body content is kept
+UNWRAPPED = {"html", "head", "body", "title"}
+# elements whose end tag may be left out before the next one (<li>1<li>2)
+IMPLICIT_END = {"p", "li", "dt", "dd", "tr", "td", "th", "option"}
+HEADINGS = ["h1", "h2", "h3", "h4"]
+URL_ATTRIBUTES = {"href", "src", "action", "formaction", "xlink:href"}
+
+Section = namedtuple("Section", "title html")
+ReportPages = namedtuple("ReportPages", "version sections")
+
+
+class _Splitter(HTMLParser):
+    def __init__(self, split_tag):
+        super().__init__(convert_charrefs=False)
+        self.split_tag = split_tag
+        self.styles = []
+        self.sections = []  # [title, [html parts]]
+        self._open = []  # (tag, start tag html) of the elements open in the current section
+        self._dropped = 0  # depth inside a dropped element
+        self._in_style = False
+        self._in_title = False
+        self._title = None  # parts of the split heading being read
+
+    def _emit(self, text):
+        if not self.sections:
+            self.sections.append([None, []])
+        self.sections[-1][1].append(text)
+        if self._title is not None:
+            self._title.append(text)
+
+    def _split(self):
+        if self.sections:
+            self.sections[-1][1].extend(f"</{tag}>" for tag, _ in reversed(self._open))
+        self.sections.append([None, [start for _, start in self._open]])
+
+    def handle_starttag(self, tag, attrs):
+        if tag in DROPPED:
+            self._dropped += tag not in VOID
+            return
+        if self._dropped:
+            return
+        if tag == "style":
+            self._in_style = True
+            return
+        if tag in UNWRAPPED:
+            self._in_title = tag == "title"
+            return
+        if tag in IMPLICIT_END and self._open and self._open[-1][0] == tag:
+            self.handle_endtag(tag)
+        start = "<" + tag + "".join(_attribute(name, value) for name, value in attrs if _allowed(name, value)) + ">"
+        if tag == self.split_tag:
+            self._split()
+            self._title = []
+        self._emit(start)
+        if tag not in VOID:
+            self._open.append((tag, start))
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID:
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        if tag in DROPPED:
+            self._dropped = max(self._dropped - (tag not in VOID), 0)
+            return
+        if self._dropped:
+            return
+        if tag == "style":
+            self._in_style = False
+            return
+        if tag in UNWRAPPED:
+            self._in_title = False
+            return
+        if tag not in [open_tag for open_tag, _ in self._open]:
+            return  # stray end tag
+        # close everything opened inside the element as well (unclosed <p>, <li>, ...)
+        while self._open:
+            open_tag, _ = self._open.pop()
+            self._emit(f"</{open_tag}>")
+            if open_tag == tag:
+                break
+        if tag == self.split_tag and self._title is not None:
+            self.sections[-1][0] = _text("".join(self._title))
+            self._title = None
+
+    def _data(self, text):
+        if self._dropped or self._in_title:
+            return
+        if self._in_style:
+            self.styles.append(text)
+        else:
+            self._emit(text)
+
+    def handle_data(self, data):
+        self._data(data if self._in_style else escape(data, quote=False))
+
+    def handle_entityref(self, name):
+        self._data(f"&{name};")
+
+    def handle_charref(self, name):
+        self._data(f"&#{name};")
+
+    def close(self):
+        super().close()
+        if self.sections:
+            self.sections[-1][1].extend(f"</{tag}>" for tag, _ in reversed(self._open))
+
+
+def _allowed(name, value):
+    if name.startswith("on") or name == "srcdoc":
+        return False
+    if name in URL_ATTRIBUTES and value and re.sub(r"[\s\x00-\x1f]", "", value).lower().startswith(("javascript:", "vbscript:")):
+        return False
+    return True
+
+
+def _attribute(name, value):
+    return f" {name}" if value is None else f' {name}="{escape(value)}"'
+
+
+def _text(html):
+    return unescape(re.sub(r"\s+", " ", re.sub(r"<[^>]*>", "", html)).strip())
+
+
+def split_tag(html):
+    """The top heading level that occurs more than once, or None."""
+    for tag in HEADINGS:
+        if len(re.findall(rf"<{tag}[\s>]", html, flags=re.IGNORECASE)) > 1:
+            return tag
+    return None
+
+
+def split_report(html):
+    """Sanitized sections [(title, html)] of a report; the styles are added to every section."""
+    splitter = _Splitter(split_tag(html))
+    splitter.feed(html)
+    splitter.close()
+    head = f"<style>{''.join(splitter.styles)}</style>" if splitter.styles else ""
+    parts = [(title, "".join(body)) for title, body in splitter.sections]
+    if len(parts) > 1 and parts[0][0] is None:
+        # the text before the first split heading (report title, intro) opens the first section
+        parts[1:2] = [(parts[1][0], parts[0][1] + parts[1][1])]
+        del parts[0]
+    return [
+        Section(title or f"Abschnitt {number}", f"<html><head>{head}</head><body>{body}</body></html>")
+        for number, (title, body) in enumerate(parts, start=1)
+    ]
+
+
+_pages = {}  # report_type -> ReportPages
+_pages_lock = threading.Lock()
+
+
+def get_report_pages(report_type):
+    """ReportPages of the newest report, or None; split only when the report version changed."""
+    latest = reports.get_latest_report_version(report_type)
+    if latest is None:
+        return None
+    version, html = latest
+    with _pages_lock:
+        cached = _pages.get(report_type)
+    if cached is not None and cached.version == version:
+        return cached
+    pages = ReportPages(version, split_report(html))
+    with _pages_lock:
+        _pages[report_type] = pages
+    return pages
+
+
+def reset():
+    with _pages_lock:
+        _pages.clear()
@@ -0,0 +1,62 @@
+import threading
+
+import queries
+from shared_cache import get_shared_cache
+
+# reports are stored by version in the shared cache, so the same HTML never changes under a key
+REPORT_SHARED_TTL = 7 * 24 * 3600
+
+_reports = {}  # report_type -> (version, html)
+_reports_lock = threading.Lock()
+
+
+def get_report_version(report_type):
+    df = queries.run("report_version", report_type=report_type)
+    if df.empty:
+        return None
+    return int(df.iloc[0].iloc[0])
+
+
+def get_latest_report(report_type):
+    """
+    HTML of the newest report of the given type, or None if there is none.
+    Only the version is checked against the warehouse (cached for the report TTL); the HTML
+    itself is downloaded again only when the version changed.
+    """
+    latest = get_latest_report_version(report_type)
+    return None if latest is None else latest[1]
+
+
+def get_latest_report_version(report_type):
+    """(version, html) of the newest report, or None; see get_latest_report."""
+    version = get_report_version(report_type)
+    if version is None:
+        return None
+    with _reports_lock:
+        cached = _reports.get(report_type)
+    if cached is not None and cached[0] == version:
+        return cached
+
+    shared = get_shared_cache()
+    if shared is None:
+        latest = _download(report_type, version)
+    else:
+        latest = shared.load(f"report:{report_type}:{version}", lambda: _download(report_type, version), ttl=REPORT_SHARED_TTL, stale_ttl=0)
+    if latest is None:
+        return None
+    with _reports_lock:
+        _reports[report_type] = latest
+    return latest
+
+
+def _download(report_type, version):
+    """(version, html) of the report with that version, or None if it was replaced meanwhile"""
+    df = queries.fetch("report_by_version", report_type=report_type, version=version)
+    if df.empty:
+        return None
+    return int(df["VERSION"].iloc[0]), df["REPORT"].iloc[0]
+
+
+def reset():
+    with _reports_lock:
+        _reports.clear()
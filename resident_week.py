@@ -0,0 +1,86 @@
+"""
+The current week's meal plan and appointments for all residents, prefetched at once.
+
+With RESIDENT_WEEK_PREFETCH=1 the Bewohner Dashboard of every resident (e.g. one wall tablet
+per room) is answered from one in-memory Week instead of per-resident queries. The week is
+loaded with a single "week_bulk" query and kept until the "week_version" check (row count and
+checksum of the week's rows, cached for CACHE_TTL_WEEK seconds) reports a change.
+"""
+import os
+import threading
+from collections import namedtuple
+from datetime import timedelta
+
+import numpy as np
+
+from appointments import as_date
+
+ENABLED = os.environ.get("RESIDENT_WEEK_PREFETCH", "").lower() in ("1", "true", "yes")
+
+Appointment = namedtuple("Appointment", "time_stamp description")
+
+
+class Week:
+    """
+    Meal plan {day: {mealtime: meal}} plus every resident's appointments in flat arrays:
+    the appointments of the resident at position i of `_residents` (sorted) are
+    `_time_stamps[_offsets[i]:_offsets[i + 1]]`, ordered by time.
+    """
+
+    def __init__(self, start, version, df):
+        self.start = start
+        self.version = version
+        meals = df[df["KIND"] == "meal"]
+        self.meals = {}
+        for time_stamp, mealtime, meal in zip(meals["TIME_STAMP"], meals["LABEL"], meals["TEXT"]):
+            self.meals.setdefault(as_date(time_stamp), {})[mealtime] = meal
+
+        rows = df[df["KIND"] == "appointment"]
+        person_ids = rows["PERSON_ID"].astype("int64").to_numpy()
+        time_stamps = rows["TIME_STAMP"].to_numpy(dtype=object)
+        order = np.lexsort((np.array([str(value) for value in time_stamps]), person_ids))
+        person_ids = person_ids[order]
+        self._residents, counts = np.unique(person_ids, return_counts=True)
+        self._offsets = np.concatenate([[0], np.cumsum(counts)])
+        self._time_stamps = time_stamps[order]
+        self._descriptions = rows["TEXT"].to_numpy(dtype=object)[order]
+
+    def days(self):
+        return [self.start + timedelta(days=offset) for offset in range(7)]
+
+    def appointments(self, resident):
+        position = np.searchsorted(self._residents, resident)
+        if position == len(self._residents) or self._residents[position] != resident:
+            return []
+        start, end = self._offsets[position], self._offsets[position + 1]
+        return [Appointment(*row) for row in zip(self._time_stamps[start:end], self._descriptions[start:end])]
+
+
+_week = None
+_lock = threading.Lock()
+
+
+def week_start(day):
+    return day - timedelta(days=day.weekday())
+
+
+def get_week(**params):
+    """Week of the reference date (Monday to Sunday), reloaded only when its version changes."""
+    global _week
+    import queries
+
+    start = week_start(queries.dashboard_params(**params)["reference_date"])
+    bounds = {"start": start, "end": start + timedelta(days=7)}
+    version = tuple(int(value) for value in queries.run("week_version", **bounds).iloc[0])
+    with _lock:
+        if _week is not None and _week.start == start and _week.version == version:
+            return _week
+        # uncached: the Week is the cache, and it is rebuilt only on a new version
+        _week = Week(start, version, queries.fetch("week_bulk", **bounds))
+        return _week
+
+
+def reset():
+    global _week
+    with _lock:
+        _week = None
@@ -0,0 +1,277 @@
+"""
+Optional cache shared by several app replicas (containers or processes).
+
+With SHARED_CACHE set, query results, report HTML and the weather reading are kept in one
+out-of-process store in addition to each process' in-memory cache, so a scaled-out deployment
+queries Snowflake (and Meteomatics) once per expiry instead of once per replica:
+
+    SHARED_CACHE=sqlite:////data/dashboard-cache.db   a SQLite file on a volume shared by the replicas of one node
+    SHARED_CACHE=redis://cache:6379/0                 any Redis-protocol server (needs the `redis` package)
+
+An expired key is reloaded by one replica only: it takes a lease-based lock while loading, and
+the others serve the stale value (or wait for the new one when there is none). If the lock
+holder dies, its lease expires after SHARED_CACHE_LOCK_LEASE seconds. When the store cannot be
+reached the app loads directly, as without a shared cache; a store that cannot be opened is
+tried again after SHARED_CACHE_RETRY seconds.
+
+Values are pickled: only point replicas of the same app version at a store nobody else writes to.
+"""
+import os
+import time
+import uuid
+import pickle
+import logging
+import sqlite3
+import threading
+
+from cache import Aged
+
+logger = logging.getLogger("shared_cache")
+
+SHARED_CACHE_RETRY = float(os.environ.get("SHARED_CACHE_RETRY", 30))  # seconds between attempts to open the store
+
+
+class StoreUnavailable(Exception):
+    pass
+
+
+class SQLiteStore:
+    """Entries and locks in a SQLite file (WAL mode, safe for several processes on one host)."""
+
+    def __init__(self, path):
+        self._path = path
+        self._local = threading.local()
+        conn = self._conn()
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY, text TEXT, value BLOB, stored_at REAL, ttl REAL, stale_ttl REAL
+            );
+            CREATE TABLE IF NOT EXISTS locks (key TEXT PRIMARY KEY, token TEXT, expires REAL);
+        """)
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self._path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        return self._conn().execute(
+            "SELECT value, stored_at, ttl, stale_ttl FROM entries WHERE key = ?", (key,)
+        ).fetchone()
+
+    def set(self, key, value, ttl, stale_ttl, text=""):
+        now = time.time()
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?)", (key, text, value, now, ttl, stale_ttl))
+            conn.execute("DELETE FROM entries WHERE stored_at + ttl + stale_ttl < ?", (now,))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def lock(self, key, lease):
+        token = uuid.uuid4().hex
+        now = time.time()
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM locks WHERE key = ? AND expires < ?", (key, now))
+            acquired = conn.execute("INSERT OR IGNORE INTO locks VALUES (?, ?, ?)", (key, token, now + lease)).rowcount == 1
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return token if acquired else None
+
+    def unlock(self, key, token):
+        self._conn().execute("DELETE FROM locks WHERE key = ? AND token = ?", (key, token))
+
+    def delete(self, key=None):
+        if key is None:
+            self._conn().execute("DELETE FROM entries")
+        else:
+            self._conn().execute("DELETE FROM entries WHERE key = ?", (key,))
+
+    def delete_matching(self, text):
+        self._conn().execute("DELETE FROM entries WHERE instr(lower(text), ?) > 0", (text.lower(),))
+
+
+class RedisStore:
+    """Entries as hashes that expire after ttl + stale_ttl; locks via SET NX PX."""
+
+    PREFIX = "dashboard:"
+    _UNLOCK = "if redis.call('get', KEYS[1]) == ARGV[1] then return redis.call('del', KEYS[1]) end return 0"
+
+    def __init__(self, url):
+        import redis  # optional dependency, only needed for redis:// URLs
+
+        self._redis = redis.Redis.from_url(url)
+        self._unlock = self._redis.register_script(self._UNLOCK)
+
+    def get(self, key):
+        fields = self._redis.hmget(self.PREFIX + "entry:" + key, "value", "stored_at", "ttl", "stale_ttl")
+        if fields[0] is None:
+            return None
+        return fields[0], float(fields[1]), float(fields[2]), float(fields[3])
+
+    def set(self, key, value, ttl, stale_ttl, text=""):
+        name = self.PREFIX + "entry:" + key
+        pipe = self._redis.pipeline()
+        pipe.hset(name, mapping={"value": value, "text": text, "stored_at": time.time(), "ttl": ttl, "stale_ttl": stale_ttl})
+        pipe.expire(name, max(1, int(ttl + stale_ttl)))
+        pipe.execute()
+
+    def lock(self, key, lease):
+        token = uuid.uuid4().hex
+        if self._redis.set(self.PREFIX + "lock:" + key, token, nx=True, px=int(lease * 1000)):
+            return token
+        return None
+
+    def unlock(self, key, token):
+        self._unlock(keys=[self.PREFIX + "lock:" + key], args=[token])
+
+    def delete(self, key=None):
+        if key is not None:
+            self._redis.delete(self.PREFIX + "entry:" + key)
+            return
+        for name in self._redis.scan_iter(self.PREFIX + "entry:*"):
+            self._redis.delete(name)
+
+    def delete_matching(self, text):
+        text = text.lower()
+        for name in self._redis.scan_iter(self.PREFIX + "entry:*"):
+            entry_text = self._redis.hget(name, "text")
+            if entry_text is not None and text in entry_text.decode().lower():
+                self._redis.delete(name)
+
+
+class SharedCache:
+    def __init__(self, store, default_ttl=300, default_stale_ttl=600, lock_lease=60, lock_wait=30, poll=0.2):
+        self._store = store
+        self._default_ttl = default_ttl
+        self._default_stale_ttl = default_stale_ttl
+        self._lock_lease = lock_lease
+        self._lock_wait = lock_wait
+        self._poll = poll
+
+    def _call(self, method, *args):
+        try:
+            return getattr(self._store, method)(*args)
+        except Exception as err:
+            logger.warning("Shared cache unavailable (%s): %s", method, err)
+            raise StoreUnavailable() from err
+
+    def _get(self, key):
+        """(value, age, ttl, stale_ttl) or None"""
+        row = self._call("get", key)
+        if row is None:
+            return None
+        value, stored_at, ttl, stale_ttl = row
+        return pickle.loads(value), time.time() - stored_at, ttl, stale_ttl
+
+    def load(self, key, loader, ttl=None, stale_ttl=None, max_age=None, serve_stale=True, text="", with_age=False):
+        """
+        Value of `key` from the shared store, or loaded by exactly one replica when it is older
+        than `max_age` (default: ttl). Replicas that do not hold the lock serve the stale value
+        while it is within ttl + stale_ttl (if `serve_stale`), else wait for the new one.
+        With `with_age` the result is a cache.Aged carrying how old the stored value already is,
+        so a QueryCache keeps it only for the rest of its lifetime.
+        """
+        result = self._load(key, loader, ttl, stale_ttl, max_age, serve_stale, text)
+        return result if with_age else result.value
+
+    def _load(self, key, loader, ttl, stale_ttl, max_age, serve_stale, text):
+        ttl = self._default_ttl if ttl is None else ttl
+        stale_ttl = self._default_stale_ttl if stale_ttl is None else stale_ttl
+        max_age = ttl if max_age is None else max_age
+        deadline = time.monotonic() + self._lock_wait
+        try:
+            while True:
+                item = self._get(key)
+                if item is not None and item[1] < max_age:
+                    return Aged(item[0], item[1])
+                token = self._call("lock", key, self._lock_lease)
+                if token is not None:
+                    break
+                if serve_stale and item is not None and item[1] < item[2] + item[3]:
+                    return Aged(item[0], item[1])
+                if time.monotonic() >= deadline:
+                    logger.warning("Gave up waiting for the shared cache lock of %s", key)
+                    return Aged(loader(), 0)
+                time.sleep(self._poll)
+        except StoreUnavailable:
+            return Aged(loader(), 0)
+
+        try:
+            # another replica may have stored a new value between our read and the lock
+            try:
+                item = self._get(key)
+            except StoreUnavailable:
+                item = None
+            if item is not None and item[1] < max_age:
+                return Aged(item[0], item[1])
+            value = loader()
+            try:
+                self._call("set", key, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), ttl, stale_ttl, text)
+            except StoreUnavailable:
+                pass
+            return Aged(value, 0)
+        finally:
+            try:
+                self._store.unlock(key, token)
+            except Exception:
+                pass  # the lease expires on its own
+
+    def delete(self, key=None):
+        try:
+            self._call("delete", key)
+        except StoreUnavailable:
+            pass
+
+    def delete_matching(self, text):
+        try:
+            self._call("delete_matching", text)
+        except StoreUnavailable:
+            pass
+
+
+def open_store(url):
+    if url.startswith("redis://") or url.startswith("rediss://"):
+        return RedisStore(url)
+    if url.startswith("sqlite:///"):
+        url = url[len("sqlite:///"):]
+    return SQLiteStore(url)
+
+
+_shared = None
+_shared_lock = threading.Lock()
+_shared_retry_at = 0.0  # monotonic time before which a failed store is not opened again
+
+
+def get_shared_cache():
+    """The configured SharedCache, or None when SHARED_CACHE is not set or cannot be opened yet."""
+    global _shared, _shared_retry_at
+    with _shared_lock:
+        url = os.environ.get("SHARED_CACHE")
+        if _shared is not None or not url or time.monotonic() < _shared_retry_at:
+            return _shared
+        try:
+            store = open_store(url)
+        except Exception:
+            # load directly meanwhile; the store may come up later (e.g. Redis starting after the app)
+            logger.exception("Shared cache %s cannot be opened, retrying in %.0f s", url, SHARED_CACHE_RETRY)
+            _shared_retry_at = time.monotonic() + SHARED_CACHE_RETRY
+            return None
+        _shared = SharedCache(
+            store,
+            default_ttl=float(os.environ.get("QUERY_CACHE_TTL", 300)),
+            default_stale_ttl=float(os.environ.get("QUERY_CACHE_STALE_TTL", 600)),
+            lock_lease=float(os.environ.get("SHARED_CACHE_LOCK_LEASE", 60)),  # seconds before a dead holder's lock expires
+            lock_wait=float(os.environ.get("SHARED_CACHE_LOCK_WAIT", 30)),    # seconds to wait for another replica's load
+        )
+        return _shared
@@ -0,0 +1,244 @@
+"""
+Nightly snapshot bundle of the dashboard datasets, for a warm start without the warehouse.
+
+Export after the nightly jobs (e.g. from cron, with the same environment as the app):
+
+    python snapshot.py [directory]
+
+Every dataset the pages load first (care counts, attendance aggregates, outlier counts, the
+latest reports, the week's meal plan and appointments) is queried once for the current
+dashboard day and written as an Arrow IPC file into a new bundle directory. The bundle is
+renamed into place complete, and the CURRENT file, which names the bundle the app serves, is
+replaced atomically. The two newest bundles are kept.
+
+With SNAPSHOT_DIR set, the app memory-maps the bundle named in CURRENT (zero-copy) and
+switches to a newer one as soon as CURRENT changes. A query whose statement and bound values
+match a dataset of the bundle is answered from it once; later loads of the same key (after its
+cache entry expires) go to the warehouse again, so the snapshot only bridges the cold start.
+"""
+import os
+import sys
+import json
+import shutil
+import hashlib
+import logging
+import threading
+from datetime import datetime, timedelta
+
+logger = logging.getLogger("snapshot")
+
+CURRENT = "CURRENT"
+KEEP_BUNDLES = 2
+
+
+def dataset_file(key):
+    """File name of a dataset in the bundle, from its cache key (see cache.make_key)."""
+    return hashlib.sha256(repr(key).encode()).hexdigest() + ".arrow"
+
+
+class SnapshotStore:
+    """The bundle named in CURRENT, reopened when the export has swapped in a new one."""
+
+    def __init__(self, directory):
+        self._directory = directory
+        self._lock = threading.Lock()
+        self._stamp = None
+        self._bundle = None
+        self._created_at = None
+        self._tables = {}  # file name -> memory-mapped table, until it is served
+
+    def _refresh(self):
+        # pyarrow is loaded only with SNAPSHOT_DIR set: app.py imports this module on every start
+        import pyarrow as pa
+        import pyarrow.ipc as ipc
+
+        try:
+            stat = os.stat(os.path.join(self._directory, CURRENT))
+        except FileNotFoundError:
+            return
+        stamp = (stat.st_ino, stat.st_mtime_ns)
+        if stamp == self._stamp:
+            return
+        self._stamp = stamp
+        with open(os.path.join(self._directory, CURRENT)) as current:
+            bundle = current.read().strip()
+        if bundle == self._bundle:
+            return
+        tables = {}
+        path = os.path.join(self._directory, bundle)
+        try:
+            for name in os.listdir(path):
+                if name.endswith(".arrow"):
+                    with pa.memory_map(os.path.join(path, name)) as source:
+                        tables[name] = ipc.open_file(source).read_all()
+            with open(os.path.join(path, "manifest.json")) as manifest:
+                created_at = datetime.fromisoformat(json.load(manifest)["created_at"])
+        except (OSError, ValueError, KeyError):
+            logger.exception("Snapshot bundle %s cannot be read", bundle)
+            return
+        self._bundle = bundle
+        self._created_at = created_at
+        self._tables = tables
+        logger.info("Serving snapshot bundle %s (%d datasets)", bundle, len(tables))
+
+    def bundle(self):
+        with self._lock:
+            self._refresh()
+            return self._bundle
+
+    def created_at(self):
+        """When the current bundle was exported, or None."""
+        with self._lock:
+            self._refresh()
+            return self._created_at
+
+    def take(self, key):
+        """Arrow table of the dataset for the cache key, or None; each dataset is served once."""
+        with self._lock:
+            self._refresh()
+            return self._tables.pop(dataset_file(key), None)
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    """The SnapshotStore of SNAPSHOT_DIR, or None when snapshots are off."""
+    global _store
+    directory = os.environ.get("SNAPSHOT_DIR")
+    if not directory:
+        return None
+    with _store_lock:
+        if _store is None:
+            _store = SnapshotStore(directory)
+        return _store
+
+
+def reset():
+    global _store
+    with _store_lock:
+        _store = None
+
+
+def open_current():
+    """Memory-map the current bundle (e.g. at startup); returns its name, or None."""
+    store = get_store()
+    return None if store is None else store.bundle()
+
+
+def created_at():
+    """Export time of the bundle being served (the data's age until the next pre-warm), or None."""
+    store = get_store()
+    return None if store is None else store.created_at()
+
+
+# ---------- EXPORT ----------
+def datasets():
+    """(query name, parameters) of every dataset in the bundle, as the pages will request them."""
+    import appointments
+    import attendance_trends
+    import forecast
+    import outlier_detector
+    import prefetch
+    import queries
+    import resident_week
+    from db import run_query
+
+    params = queries.dashboard_params()
+    reference_date, day = params["reference_date"], params["day"]
+    # the same sources as the Pflege cards (see views/pflege.py)
+    if prefetch.ENABLED:
+        items = [("caretaker_metrics", {})]
+    else:
+        items = [("count_in_care", {}), ("attendance", {})]
+        if not outlier_detector.ENABLED:
+            items.append(("outlier_count", {}))
+    items.append(("daily_attendance", {"start": day - timedelta(days=attendance_trends.HISTORY_DAYS), "day": day}))
+    for report_type in ("outlier", "forecast"):
+        items.append(("report_version", {"report_type": report_type}))
+        # the HTML is looked up by the version the app will see, so it is read live here as well
+        probe = queries.QUERIES["report_version"]
+        df = run_query(probe.sql, probe.bind(queries.dashboard_params(report_type=report_type)), use_snapshot=False)
+        if not df.empty:
+            items.append(("report_by_version", {"report_type": report_type, "version": int(df.iloc[0].iloc[0])}))
+    try:
+        # like views/bewohner.resident_id: a value that is not a number is no resident
+        resident = int(os.environ.get("DASHBOARD_RESIDENT", ""))
+    except ValueError:
+        resident = None
+    if resident is not None:
+        # the calendar of a wall tablet's resident (this month's grid, see views/bewohner.py)
+        start, end = appointments.month_grid(reference_date.replace(day=1))
+        items.append(("appointments_range", {"resident": resident, "start": start, "end": end}))
+    if outlier_detector.ENABLED:
+        items.append(("attendance_history", {"start": day - timedelta(days=outlier_detector.new_detector().window), "day": day}))
+    if forecast.ENABLED:
+        items.append(("meal_attendance", {"start": day - timedelta(days=forecast.HISTORY_DAYS), "day": day}))
+        items.append(("mealplan_range", {"start": reference_date, "day": reference_date + timedelta(days=6)}))
+    if resident_week.ENABLED:
+        week = resident_week.week_start(reference_date)
+        items.append(("week_version", {"start": week, "end": week + timedelta(days=7)}))
+        items.append(("week_bulk", {"start": week, "end": week + timedelta(days=7)}))
+    return items
+
+
+def _write(path, table):
+    import pyarrow as pa
+    import pyarrow.ipc as ipc
+
+    with pa.OSFile(path, "wb") as sink, ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+
+
+def export(directory):
+    """Write a new bundle and point CURRENT at it. Returns the bundle name and its datasets."""
+    import pyarrow as pa
+
+    import queries
+    from cache import make_key
+    from db import run_query
+
+    bundle = datetime.now().strftime("%Y%m%dT%H%M%S")
+    work_path = os.path.join(directory, bundle + ".tmp")
+    os.makedirs(work_path)
+    manifest = {"created_at": datetime.now().isoformat(timespec="seconds"), "datasets": []}
+    try:
+        for name, params in datasets():
+            query = queries.QUERIES[name]
+            bound = query.bind(queries.dashboard_params(**params))
+            df = run_query(query.sql, bound, use_snapshot=False)
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            file_name = dataset_file(make_key(query.sql, bound))
+            _write(os.path.join(work_path, file_name), table)
+            manifest["datasets"].append({"name": name, "params": [str(value) for value in bound], "file": file_name, "rows": table.num_rows})
+        with open(os.path.join(work_path, "manifest.json"), "w") as out:
+            json.dump(manifest, out, indent=2)
+        os.rename(work_path, os.path.join(directory, bundle))
+    except Exception:
+        # CURRENT still names the previous bundle; only the half-written one goes
+        shutil.rmtree(work_path, ignore_errors=True)
+        raise
+
+    current_path = os.path.join(directory, CURRENT)
+    with open(current_path + ".tmp", "w") as out:
+        out.write(bundle + "\n")
+    os.replace(current_path + ".tmp", current_path)
+
+    # keep the previous bundle: replicas may still be reading it
+    bundles = sorted(name for name in os.listdir(directory) if os.path.isdir(os.path.join(directory, name)) and not name.endswith(".tmp"))
+    for old in bundles[:-KEEP_BUNDLES]:
+        shutil.rmtree(os.path.join(directory, old), ignore_errors=True)
+    return bundle, manifest["datasets"]
+
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    target = sys.argv[1] if len(sys.argv) > 1 else os.environ.get("SNAPSHOT_DIR", "snapshots")
+    os.makedirs(target, exist_ok=True)
+    bundle, written = export(target)
+    for dataset in written:
+        print(f"{dataset['name']}: {dataset['rows']} rows")
+    print(f"CURRENT -> {bundle}")
@@ -0,0 +1,10 @@
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT, os.path.join(ROOT, "benchmarks")]
+
+import fake_backend  # noqa: E402
+
+# db imports snowflake.connector: the tests run against the fake connector
+fake_backend.install()
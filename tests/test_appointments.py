@@ -0,0 +1,49 @@
+from datetime import date, datetime
+from types import SimpleNamespace
+
+import appointments
+from appointments import IntervalIndex
+
+
+def day(number):
+    return date(2025, 3, number)
+
+
+def test_missing_returns_the_uncovered_parts():
+    index = IntervalIndex(ttl=300)
+    assert index.missing(day(1), day(10)) == [(day(1), day(10))]
+    index.add(day(3), day(5), [])
+    index.add(day(7), day(8), [])
+    assert index.missing(day(1), day(10)) == [(day(1), day(3)), (day(5), day(7)), (day(8), day(10))]
+    assert index.missing(day(3), day(5)) == []
+    assert index.missing(day(4), day(7)) == [(day(5), day(7))]
+
+
+def test_add_ignores_a_range_that_is_loaded_already():
+    index = IntervalIndex(ttl=300)
+    index.add(day(1), day(10), [(datetime(2025, 3, 2, 9), "Arzt")])
+    index.add(day(2), day(4), [(datetime(2025, 3, 2, 9), "Arzt")])
+    assert index.events(day(1), day(10)) == [(datetime(2025, 3, 2, 9), "Arzt")]
+
+
+def test_events_come_from_every_range_once_and_in_range():
+    arzt, besuch, ausflug = (datetime(2025, 3, 1, 9), "Arzt"), (datetime(2025, 3, 4, 16), "Besuch"), (datetime(2025, 3, 5), "Ausflug")
+    friseur, gymnastik = (datetime(2025, 3, 9, 14), "Friseur"), (datetime(2025, 3, 11, 10), "Gymnastik")
+    index = IntervalIndex(ttl=300)
+    index.add(day(5), day(10), [friseur, ausflug])
+    index.add(day(1), day(5), [besuch, arzt])
+    # overlaps the first range: its days must not be reported twice
+    index.add(day(8), day(12), [friseur, gymnastik])
+    assert index.events(day(1), day(12)) == [arzt, besuch, ausflug, friseur, gymnastik]
+    assert index.events(day(4), day(9)) == [besuch, ausflug]
+
+
+def test_loaded_ranges_expire(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(appointments, "time", SimpleNamespace(monotonic=lambda: now[0]))
+    index = IntervalIndex(ttl=300)
+    index.add(day(1), day(5), [])
+    now[0] += 299
+    assert index.missing(day(1), day(5)) == []
+    now[0] += 1
+    assert index.missing(day(1), day(5)) == [(day(1), day(5))]
@@ -0,0 +1,69 @@
+import sqlite3
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import fake_backend
+
+import attendance_trends
+import queries
+from attendance_trends import TrendCache, downsample, to_table
+
+
+def frame(table):
+    df = table.to_pandas().astype({"MEALTIME": str, "EMPLOYEE": str})
+    return df.sort_values(["DAY", "MEALTIME", "EMPLOYEE"]).reset_index(drop=True)
+
+
+def test_append_after_the_watermark_equals_a_full_rebuild(tmp_path, monkeypatch):
+    monkeypatch.setattr(attendance_trends, "HISTORY_DAYS", 30)
+    path = str(tmp_path / "attendance_daily.arrow")
+    watermark, day = date(2025, 3, 10), date(2025, 3, 18)
+    cache = TrendCache(path=path, refresh_interval=0)
+    assert frame(cache.table(watermark))["DAY"].max() == watermark
+
+    # a late row of the watermark day, of a resident without a caretaker
+    conn = sqlite3.connect(fake_backend.DB_URI, uri=True, isolation_level=None)
+    mealplan_id = conn.execute("SELECT MEALPLAN_ID FROM MEALPLAN WHERE MEAL_DATE = ? AND MEALTIME = 'lunch'", (watermark.isoformat(),)).fetchone()[0]
+    conn.execute("INSERT INTO HISTORICAL_DATA VALUES (9999, ?, ?, 'Yes')", (watermark.isoformat(), mealplan_id))
+    try:
+        start = watermark - timedelta(days=30)
+        rebuilt = frame(to_table(queries.fetch("daily_attendance", start=start, day=day)))
+        assert frame(cache.table(day)).equals(rebuilt)
+        assert (rebuilt["EMPLOYEE"] == "–").any()
+        # after a restart the append starts from the file's watermark
+        assert frame(TrendCache(path=path, refresh_interval=0).table(day)).equals(rebuilt)
+    finally:
+        conn.execute("DELETE FROM HISTORICAL_DATA WHERE PERSON_ID = 9999")
+        conn.close()
+
+
+def series(days, groups=("lunch", "dinner")):
+    rng = np.random.default_rng(3)
+    start = np.datetime64("2024-03-19")
+    rows = [(start + offset, group, int(rng.integers(0, 30)), 30) for offset in range(days) for group in groups]
+    return pd.DataFrame(rows, columns=["DAY", "GROUP", "APPEARED_YES", "MEALS"])
+
+
+@pytest.mark.parametrize("days, max_points", [(365, 120), (121, 120), (365, 10), (1000, 3)])
+def test_downsample_keeps_the_ends_and_the_size(days, max_points):
+    df = series(days)
+    sampled = downsample(df, max_points)
+    for group, points in sampled.groupby("GROUP"):
+        original = df[df["GROUP"] == group]
+        assert len(points) <= max_points
+        assert points["DAY"].min() == original["DAY"].min() and points["DAY"].max() == original["DAY"].max()
+        # the ends are the exact days, and the buckets keep every meal
+        first, last = points.sort_values("DAY").iloc[[0, -1]]["RATE"]
+        assert first == original.iloc[0]["APPEARED_YES"] / 30 and last == original.iloc[-1]["APPEARED_YES"] / 30
+        assert points[["APPEARED_YES", "MEALS"]].sum().tolist() == original[["APPEARED_YES", "MEALS"]].sum().tolist()
+
+
+def test_short_ranges_are_not_downsampled():
+    df = series(120)
+    sampled = downsample(df, 120)
+    assert sampled[["DAY", "GROUP", "APPEARED_YES", "MEALS"]].equals(df)
+    assert np.allclose(sampled["RATE"], df["APPEARED_YES"] / 30)
+    assert downsample(df.iloc[:0])["RATE"].empty
@@ -0,0 +1,14 @@
+import pytest
+
+from views import bewohner
+
+
+@pytest.mark.parametrize("value, expected", [("12", 12), (" 7 ", 7), ("abc", None), ("12abc", None), ("²", None), ("", None)])
+def test_resident_id(monkeypatch, value, expected):
+    monkeypatch.setenv("DASHBOARD_RESIDENT", value)
+    assert bewohner.resident_id() == expected
+
+
+def test_no_resident(monkeypatch):
+    monkeypatch.delenv("DASHBOARD_RESIDENT", raising=False)
+    assert bewohner.resident_id() is None
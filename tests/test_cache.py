@@ -0,0 +1,141 @@
+import threading
+import time
+
+from cache import QueryCache, make_key
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("condition not reached")
+        time.sleep(0.01)
+
+
+def test_make_key_ignores_whitespace_and_semicolon():
+    assert make_key("SELECT 1\n  FROM t;", (1,)) == make_key("SELECT 1 FROM t", [1])
+
+
+def test_hit_within_ttl_loads_once():
+    cache = QueryCache(default_ttl=60, default_stale_ttl=0)
+    calls = []
+    for _ in range(3):
+        assert cache.get_or_load("k", lambda: calls.append(1) or "v") == "v"
+    assert len(calls) == 1
+    assert cache.stats()["hits"] == 2
+
+
+def test_expired_entry_is_reloaded():
+    cache = QueryCache(default_ttl=0.05, default_stale_ttl=0)
+    values = iter(["old", "new"])
+    assert cache.get_or_load("k", lambda: next(values)) == "old"
+    time.sleep(0.1)
+    assert cache.get_or_load("k", lambda: next(values)) == "new"
+
+
+def test_lru_eviction():
+    cache = QueryCache(max_entries=2)
+    cache.get_or_load("a", lambda: 1)
+    cache.get_or_load("b", lambda: 2)
+    cache.get_or_load("a", lambda: 1)  # a is now the most recently used
+    cache.get_or_load("c", lambda: 3)
+    calls = []
+    assert cache.get_or_load("a", lambda: calls.append("a") or 1) == 1
+    assert cache.get_or_load("b", lambda: calls.append("b") or 2) == 2
+    assert calls == ["b"]
+
+
+def test_concurrent_misses_run_one_load():
+    cache = QueryCache()
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def loader():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return "v"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_load("k", loader))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    started.wait(5)
+    wait_for(lambda: cache.stats()["waits"] == 7)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    assert results == ["v"] * 8
+    assert len(calls) == 1
+
+
+def test_failed_load_is_raised_to_waiters_and_not_cached():
+    cache = QueryCache()
+    started, release = threading.Event(), threading.Event()
+
+    def failing():
+        started.set()
+        release.wait(5)
+        raise ValueError("boom")
+
+    errors = []
+
+    def call():
+        try:
+            cache.get_or_load("k", failing)
+        except ValueError as err:
+            errors.append(err)
+
+    owner = threading.Thread(target=call)
+    owner.start()
+    started.wait(5)
+    waiter = threading.Thread(target=call)
+    waiter.start()
+    wait_for(lambda: cache.stats()["waits"] == 1)
+    release.set()
+    owner.join(5)
+    waiter.join(5)
+    assert len(errors) == 2
+    assert cache.get_or_load("k", lambda: "ok") == "ok"
+
+
+def test_stale_while_revalidate_serves_stale_and_refreshes_once():
+    cache = QueryCache(default_ttl=0.05, default_stale_ttl=60)
+    cache.get_or_load("k", lambda: "old")
+    time.sleep(0.1)
+    release = threading.Event()
+    refreshes = []
+
+    def slow_refresh():
+        refreshes.append(1)
+        release.wait(5)
+        return "new"
+
+    # every read during the refresh gets the stale value without blocking, and only one refresh runs
+    for _ in range(5):
+        assert cache.get_or_load("k", slow_refresh) == "old"
+    release.set()
+    wait_for(lambda: cache.get_or_load("k", slow_refresh) == "new")
+    assert len(refreshes) == 1
+    assert cache.stats()["stale_hits"] >= 5
+
+
+def test_failed_refresh_keeps_stale_value():
+    cache = QueryCache(default_ttl=0.05, default_stale_ttl=60)
+    cache.get_or_load("k", lambda: "old")
+    time.sleep(0.1)
+
+    def failing():
+        raise RuntimeError("warehouse down")
+
+    assert cache.get_or_load("k", failing) == "old"
+    time.sleep(0.1)  # the background refresh has failed by now
+    assert cache.get_or_load("k", failing) == "old"
+
+
+def test_invalidate_matching():
+    cache = QueryCache()
+    cache.get_or_load(make_key("SELECT * FROM person"), lambda: 1)
+    cache.get_or_load(make_key("SELECT * FROM mealplan"), lambda: 2)
+    cache.invalidate_matching("PERSON")
+    assert cache.stats()["entries"] == 1
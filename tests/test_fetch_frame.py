@@ -0,0 +1,32 @@
+import pandas as pd
+import pyarrow as pa
+
+from db import fetch_frame
+
+
+class Cursor:
+    def __init__(self, tables):
+        self._tables = tables
+        self.description = [(name,) for name in tables[0].column_names] if tables else [("A",)]
+
+    def fetch_arrow_batches(self):
+        return iter(self._tables)
+
+
+def test_batches_are_combined_with_categories_and_wide_ids():
+    cur = Cursor([
+        pa.table({"PERSON_ID": [1, 2], "MEALTIME": ["lunch", "dinner"], "PRESENT": [1, 0]}),
+        pa.table({"PERSON_ID": [300000, 4], "MEALTIME": ["breakfast", "lunch"], "PRESENT": [0, 1]}),
+    ])
+    df = fetch_frame(cur)
+    assert df["PERSON_ID"].tolist() == [1, 2, 300000, 4]
+    assert df["PERSON_ID"].dtype == "int64"  # not narrowed to the first batch's range
+    assert isinstance(df["MEALTIME"].dtype, pd.CategoricalDtype)
+    assert df["MEALTIME"].tolist() == ["lunch", "dinner", "breakfast", "lunch"]
+    assert df["PRESENT"].dtype == "int8"
+
+
+def test_empty_result_keeps_headers():
+    cur = Cursor([])
+    cur.description = [("COUNT",)]
+    assert list(fetch_frame(cur).columns) == ["COUNT"]
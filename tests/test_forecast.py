@@ -0,0 +1,67 @@
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+import forecast
+from forecast import AttendanceModel, forecast_table
+
+
+def history(days, present):
+    rows = []
+    start = date(2025, 3, 1)
+    for offset in range(days):
+        for person in (1, 2):
+            for mealtime, meal in (("breakfast", "Brot"), ("lunch", "Pizza")):
+                rows.append((person, mealtime, meal, start + timedelta(days=offset), present[mealtime]))
+    return pd.DataFrame(rows, columns=["PERSON_ID", "MEALTIME", "MEAL", "DAY", "PRESENT"])
+
+
+def test_meal_time_nobody_attended_forecasts_zero():
+    model = AttendanceModel()
+    model.update(history(14, {"breakfast": 0.0, "lunch": 1.0}))
+    factors = model.meal_factors()
+    assert not factors.isna().any()
+    assert factors[("breakfast", "Brot")] == 1.0
+
+    plan = pd.DataFrame({
+        "MEAL_DATE": [date(2025, 3, 15)] * 2, "MEALTIME": ["breakfast", "lunch"], "MEAL": ["Brot", "Pizza"],
+    })
+    table = forecast_table(model.predict(plan))
+    assert table["Erwartet"].dtype.kind == "i"
+    assert np.all((table["Quote"] >= 0) & (table["Quote"] <= 1))
+
+
+def test_model_fitted_on_no_attendance_predicts_nothing():
+    model = AttendanceModel()
+    model.update(history(0, {}))
+    assert model.last_day is None
+    keys, probability = model.probabilities()
+    assert len(keys) == 0 and probability.shape == (0, 7)
+
+    plan = pd.DataFrame({"MEAL_DATE": [date(2025, 3, 15)], "MEALTIME": ["lunch"], "MEAL": ["Pizza"]})
+    table = forecast_table(model.predict(plan))
+    assert table.empty
+    assert list(table.columns) == ["Datum", "Mahlzeit", "Gericht", "Erwartet", "Quote"]
+
+
+def test_an_empty_fit_is_kept(monkeypatch):
+    fetched = []
+
+    def fetch(start, end):
+        fetched.append((start, end))
+        return history(0, {})
+
+    monkeypatch.setenv("DASHBOARD_DATE", "2025-03-20")
+    monkeypatch.setattr(forecast, "_fetch", fetch)
+    forecast.reset()
+    try:
+        model = forecast.fitted_model()
+        assert forecast.fitted_model() is model
+        assert len(fetched) == 1
+        # the next day only fetches that day
+        monkeypatch.setenv("DASHBOARD_DATE", "2025-03-21")
+        assert forecast.fitted_model() is model
+        assert fetched[1] == (date(2025, 3, 20), date(2025, 3, 20))
+    finally:
+        forecast.reset()
@@ -0,0 +1,44 @@
+import logging
+import socket
+import urllib.request
+
+import instrumentation
+
+
+def test_port_in_use_is_reported_once(monkeypatch, caplog):
+    monkeypatch.setattr(instrumentation, "_server", None)
+    monkeypatch.setattr(instrumentation, "_server_attempted", False)
+    with socket.socket() as taken:
+        taken.bind(("127.0.0.1", 0))
+        taken.listen()
+        monkeypatch.setenv("METRICS_PORT", str(taken.getsockname()[1]))
+        with caplog.at_level(logging.ERROR, logger="instrumentation"):
+            instrumentation.start_http_server()
+            instrumentation.start_http_server()  # the next rerun
+    assert len(caplog.records) == 1
+    assert instrumentation._server is None
+
+
+def test_serves_on_localhost_by_default(monkeypatch):
+    monkeypatch.setattr(instrumentation, "_server", None)
+    monkeypatch.setattr(instrumentation, "_server_attempted", False)
+    monkeypatch.delenv("METRICS_HOST", raising=False)
+    monkeypatch.setenv("METRICS_PORT", "0")
+    instrumentation.start_http_server()
+    server = instrumentation._server
+    try:
+        host, port = server.server_address
+        assert host == "127.0.0.1"
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics", timeout=5) as response:
+            assert response.status == 200
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_no_port_no_server(monkeypatch):
+    monkeypatch.setattr(instrumentation, "_server", None)
+    monkeypatch.setattr(instrumentation, "_server_attempted", False)
+    monkeypatch.delenv("METRICS_PORT", raising=False)
+    instrumentation.start_http_server()
+    assert instrumentation._server is None
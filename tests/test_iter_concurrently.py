@@ -0,0 +1,11 @@
+from db import iter_concurrently
+
+
+def test_failure_is_yielded_and_other_tasks_complete():
+    def failing():
+        raise IndexError("no rows")
+
+    results = {name: (result, error) for name, result, error in iter_concurrently({"ok": lambda: 3, "broken": failing})}
+    assert results["ok"] == (3, None)
+    assert results["broken"][0] is None
+    assert isinstance(results["broken"][1], IndexError)
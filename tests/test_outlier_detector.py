@@ -0,0 +1,81 @@
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+import outlier_detector
+from outlier_detector import OutlierDetector
+
+START = date(2025, 3, 1)
+
+
+def history(rows):
+    """Prepared rows from (person, mealtime, day offset, present, has appointment) tuples."""
+    return outlier_detector.prepare(pd.DataFrame({
+        "PERSON_ID": [person for person, _, _, _, _ in rows],
+        "EMPLOYEE": "Employee A",
+        "MEALTIME": [mealtime for _, mealtime, _, _, _ in rows],
+        "MEAL_DATE": [START + timedelta(days=offset) for _, _, offset, _, _ in rows],
+        "PRESENT": [present for _, _, _, present, _ in rows],
+        "HAS_APPOINTMENT": [appointment for _, _, _, _, appointment in rows],
+    }))
+
+
+def score_days(detector, df):
+    return {day: detector.score(rows.reset_index(drop=True)) for day, rows in df.groupby("DAY", sort=True)}
+
+
+def single_series(flags, **params):
+    """Scores of one series, day by day; a flag of None is an excused absence."""
+    rows = [(1, "lunch", offset, 0 if flag is None else flag, int(flag is None)) for offset, flag in enumerate(flags)]
+    scored = score_days(OutlierDetector(**params), history(rows))
+    return [scored[START + timedelta(days=offset)].iloc[0] for offset in range(len(flags))]
+
+
+def test_bootstrap_matches_scoring_day_by_day():
+    rng = np.random.default_rng(7)
+    rows = [
+        (person, mealtime, offset, int(rng.random() < 0.75), int(rng.random() < 0.05))
+        for offset in range(40)
+        for person in range(1, 13)
+        for mealtime in ("lunch", "dinner")
+        # some residents arrive later, some skip days without any record
+        if offset >= person and rng.random() < 0.9
+    ]
+    df = history(rows)
+    params = {"window": 10, "min_history": 3, "streak": 3}
+    incremental = score_days(OutlierDetector(**params), df)
+
+    for day in sorted(incremental)[12:]:
+        detector = OutlierDetector(**params)
+        detector.bootstrap(df[df["DAY"] < day])
+        expected = detector.score(df[df["DAY"] == day].reset_index(drop=True))
+        actual = incremental[day]
+        assert actual["OUTLIER"].tolist() == expected["OUTLIER"].tolist()
+        assert actual["STREAK"].tolist() == expected["STREAK"].tolist()
+        np.testing.assert_allclose(actual["Z"], expected["Z"], equal_nan=True)
+
+
+def test_excused_absences_are_not_flagged():
+    scores = single_series([1, 1, 1, 1, 1, 1, 1, None, 0, 0, None, 0], min_history=3, streak=3)
+    assert not scores[7]["OUTLIER"] and np.isnan(scores[7]["PRESENT"])
+    assert [score["STREAK"] for score in scores[7:]] == [0, 1, 2, 2, 3]
+    # an excused day neither breaks the streak nor is flagged itself
+    assert not scores[10]["OUTLIER"]
+    assert scores[11]["OUTLIER"]
+
+
+def test_streaks_carry_over_across_days():
+    # z scoring needs more history than there is: only the streak can flag
+    scores = single_series([0, 0, 0, 1, 0, 0, 0, 0], min_history=100, streak=3)
+    assert [score["STREAK"] for score in scores] == [1, 2, 3, 0, 1, 2, 3, 4]
+    assert [bool(score["OUTLIER"]) for score in scores] == [False, False, True, False, False, False, True, True]
+
+
+def test_window_wraps():
+    # window 3: on the last day the baseline is the three days before it (1, 1, 0), not the
+    # whole history, however often the ring buffer's position has wrapped
+    mean, std = 2 / 3, np.sqrt(2 / 3 - 4 / 9)
+    for flags in ([1, 1, 1, 1, 0, 0], [0, 0, 0, 1, 1, 0, 0], [0, 0, 0, 0, 0, 0, 1, 1, 0, 0]):
+        scores = single_series(flags, window=3, min_history=1, z_threshold=10)
+        assert np.isclose(scores[-1]["Z"], (0 - mean) / std)
@@ -0,0 +1,73 @@
+import pytest
+
+import fake_backend
+import outlier_summary
+
+
+class Cursor:
+    """Records statements; fails on the statements listed in `failing`."""
+
+    def __init__(self, failing=()):
+        self.statements = []
+        self.failing = failing
+        self.description = []
+
+    def execute(self, sql, params=None):
+        self.statements.append(sql)
+        for prefix, error in self.failing:
+            if sql.startswith(prefix):
+                raise error
+        if sql.startswith("SELECT MAX"):
+            self.row = (None,)
+        self.description = [("DAY",), ("EMPLOYEE",), ("OUTLIER_COUNT",)]
+        self.rowcount = 0
+
+    def fetchone(self):
+        return self.row
+
+    def close(self):
+        pass
+
+
+class Pool:
+    def __init__(self, cur):
+        self.cur = cur
+
+    def connection(self):
+        pool = self
+
+        class Context:
+            def __enter__(self):
+                return type("Conn", (), {"cursor": lambda _: pool.cur})()
+
+            def __exit__(self, *exc):
+                return False
+
+        return Context()
+
+
+def test_migrate_adds_missing_column_and_empties_old_rows():
+    conn = fake_backend.connect()
+    cur = conn.cursor()
+    cur.execute("CREATE TABLE SUMMARY_OLD (DAY TEXT, EMPLOYEE TEXT, OUTLIER_COUNT INTEGER)")
+    cur.execute("INSERT INTO SUMMARY_OLD VALUES ('2025-03-18', 'Employee A', 3)")
+    table = outlier_summary.SUMMARY_TABLE
+    try:
+        outlier_summary.SUMMARY_TABLE = "SUMMARY_OLD"
+        outlier_summary.migrate(cur)
+        outlier_summary.migrate(cur)  # a second run changes nothing
+    finally:
+        outlier_summary.SUMMARY_TABLE = table
+    cur.execute("SELECT * FROM SUMMARY_OLD")
+    assert [desc[0] for desc in cur.description] == ["DAY", "EMPLOYEE", "OUTLIER_COUNT", "MEALTIME"]
+    assert cur.fetchall() == []
+    cur.execute("DROP TABLE SUMMARY_OLD")
+    conn.close()
+
+
+def test_failed_rollback_does_not_hide_the_original_error(monkeypatch):
+    cur = Cursor(failing=[("INSERT", ValueError("insert failed")), ("ROLLBACK", RuntimeError("connection lost"))])
+    monkeypatch.setattr(outlier_summary, "get_pool", lambda: Pool(cur))
+    with pytest.raises(ValueError, match="insert failed"):
+        outlier_summary.refresh()
+    assert cur.statements[-1] == "ROLLBACK"
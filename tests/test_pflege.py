@@ -0,0 +1,22 @@
+import db
+from views import pflege
+
+
+def test_attendance_counts_default_to_zero(monkeypatch):
+    # no cafeteria data for the day before: no "Yes" and no "No" row
+    monkeypatch.setenv("DASHBOARD_DATE", "2025-06-01")
+    db.invalidate()
+    try:
+        assert pflege.load_attendance() == (0, 0)
+    finally:
+        db.invalidate()
+
+
+def test_attendance_counts(monkeypatch):
+    monkeypatch.setenv("DASHBOARD_DATE", "2025-03-19")
+    db.invalidate()
+    try:
+        appeared, not_appeared = pflege.load_attendance()
+        assert appeared > 0 and not_appeared >= 0
+    finally:
+        db.invalidate()
@@ -0,0 +1,83 @@
+import threading
+import time
+
+import pytest
+
+from db import ConnectionPool
+
+
+class Conn:
+    def __init__(self):
+        self.closed = False
+
+    def is_closed(self):
+        return self.closed
+
+    def close(self):
+        self.closed = True
+
+    def cursor(self):
+        raise AssertionError("no health check expected")
+
+
+def test_reuses_released_connection():
+    created = []
+    pool = ConnectionPool(lambda: created.append(Conn()) or created[-1], max_size=2)
+    with pool.connection() as first:
+        pass
+    with pool.connection() as second:
+        pass
+    assert first is second
+    assert len(created) == 1
+    assert pool.stats() == {"idle": 1, "in_use": 0, "max_size": 2}
+
+
+def test_blocks_at_size_limit_until_release():
+    pool = ConnectionPool(Conn, max_size=2, timeout=5)
+    first, second = pool.acquire(), pool.acquire()
+    acquired = []
+    waiter = threading.Thread(target=lambda: acquired.append(pool.acquire()))
+    waiter.start()
+    time.sleep(0.1)
+    assert acquired == []  # both connections are checked out
+    pool.release(first)
+    waiter.join(5)
+    assert acquired == [first]
+    assert pool.stats()["in_use"] == 2
+    pool.release(second)
+
+
+def test_times_out_when_exhausted():
+    pool = ConnectionPool(Conn, max_size=1, timeout=0.1)
+    pool.acquire()
+    with pytest.raises(TimeoutError):
+        pool.acquire()
+
+
+def test_discarded_and_closed_connections_are_not_reused():
+    pool = ConnectionPool(Conn, max_size=1)
+    conn = pool.acquire()
+    pool.release(conn, discard=True)
+    assert conn.closed
+    assert pool.acquire() is not conn
+
+
+def test_factory_error_frees_the_slot():
+    def failing():
+        raise RuntimeError("login failed")
+
+    pool = ConnectionPool(failing, max_size=1, timeout=0.1)
+    for _ in range(2):
+        with pytest.raises(RuntimeError):
+            pool.acquire()
+    assert pool.stats()["in_use"] == 0
+
+
+def test_close_closes_idle_connections():
+    pool = ConnectionPool(Conn, max_size=1)
+    conn = pool.acquire()
+    pool.release(conn)
+    pool.close()
+    assert conn.closed
+    with pytest.raises(RuntimeError):
+        pool.acquire()
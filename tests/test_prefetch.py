@@ -0,0 +1,42 @@
+import pandas as pd
+import pytest
+
+import fake_backend
+
+import db
+import prefetch
+import queries
+
+
+@pytest.mark.parametrize("date", ["2025-03-19", "2025-06-01"])
+def test_index_matches_the_individual_queries(monkeypatch, date):
+    monkeypatch.setenv("DASHBOARD_DATE", date)
+    db.invalidate()
+    prefetch.reset()
+    try:
+        for caretaker in fake_backend.EMPLOYEES + ["Employee Z"]:
+            expected = int(queries.fetch("count_in_care", caretaker=caretaker).iloc[0].iloc[0])
+            assert prefetch.caretaker_metrics(caretaker=caretaker).in_care == expected
+
+        facility = prefetch.facility_metrics()
+        assert facility.outliers == int(queries.fetch("outlier_count").iloc[0].iloc[0])
+        counts = queries.fetch("attendance").set_index("APPEARED")["COUNT"]
+        assert facility.appeared_yes == int(counts.get("Yes", 0))
+        assert facility.appeared_no == int(counts.get("No", 0))
+    finally:
+        db.invalidate()
+        prefetch.reset()
+
+
+def test_rows_without_a_caretaker_count_towards_the_facility(monkeypatch):
+    df = pd.DataFrame({
+        "EMPLOYEE": ["Employee A", None, "Employee A", None],
+        "IN_CARE": [2, 1, 0, 0],
+        "OUTLIERS": [0, 0, 1, 0],
+        "APPEARED_YES": [0, 0, 3, 4],
+        "APPEARED_NO": [0, 0, 1, 2],
+    })
+    index = prefetch.build_index(df)
+    assert index["Employee A"] == prefetch.CaretakerMetrics(2, 1, 3, 1)
+    monkeypatch.setattr(prefetch, "get_index", lambda **params: index)
+    assert prefetch.facility_metrics() == prefetch.CaretakerMetrics(3, 1, 7, 3)
@@ -0,0 +1,67 @@
+from datetime import datetime
+
+import pytest
+
+import db
+import outlier_detector
+import prefetch
+import prewarm
+import queries
+
+
+@pytest.fixture
+def warmed(monkeypatch):
+    """Names passed to queries.warm; "outlier_count" fails like a missing summary table."""
+    names = []
+
+    def warm(name, stale_ttl=None, **params):
+        if name == "outlier_count":
+            raise RuntimeError("no such table: OUTLIER_DAILY_SUMMARY")
+        names.append(name)
+
+    monkeypatch.setenv("DASHBOARD_DATE", "2025-03-19")
+    monkeypatch.setattr(queries, "warm", warm)
+    monkeypatch.setattr(prewarm, "_state", {"last_run": None, "last_error": None})
+    db.invalidate()
+    yield names
+    db.invalidate()
+    outlier_detector.reset()
+
+
+def test_a_failing_step_does_not_stop_the_others(warmed):
+    assert prewarm.run_once() is False
+    assert warmed == ["count_in_care", "attendance", "report_version", "report_version"]
+    assert prewarm.last_run() is not None
+    assert "outlier_count" in prewarm.last_error()
+
+
+def test_warms_what_the_enabled_modes_read(warmed, monkeypatch):
+    monkeypatch.setattr(outlier_detector, "ENABLED", True)
+    ok, failed = prewarm.warm_all()
+    assert failed == [] and "outlier_detector" in ok and "outlier_count" not in ok
+
+    warmed.clear()
+    monkeypatch.setattr(prefetch, "ENABLED", True)
+    prewarm.warm_all()
+    assert warmed[0] == "caretaker_metrics" and "count_in_care" not in warmed and "attendance" not in warmed
+
+
+def test_parse_times():
+    assert prewarm.parse_times(prewarm.DEFAULT_TIMES) == [(2, 30), (5, 45)]
+    assert prewarm.parse_times(" 18:05, 06:00 ,") == [(6, 0), (18, 5)]
+    assert prewarm.parse_times("") == []
+
+
+@pytest.mark.parametrize("value", ["7", "07:00:00", "24:00", "06:60", "x:15", "-1:30"])
+def test_parse_times_skips_invalid_entries(value):
+    assert prewarm.parse_times(value + ",05:45") == [(5, 45)]
+
+
+def test_next_run():
+    times = [(2, 30), (5, 45)]
+    assert prewarm.next_run(datetime(2025, 3, 19, 1, 0), times) == datetime(2025, 3, 19, 2, 30)
+    assert prewarm.next_run(datetime(2025, 3, 19, 2, 30), times) == datetime(2025, 3, 19, 5, 45)
+    # after the last time of the day: the first time of the next day, also across a month
+    assert prewarm.next_run(datetime(2025, 3, 19, 23, 0), times) == datetime(2025, 3, 20, 2, 30)
+    assert prewarm.next_run(datetime(2025, 3, 31, 6, 0), times) == datetime(2025, 4, 1, 2, 30)
+    assert prewarm.next_run(datetime(2025, 3, 19, 6, 0), []) is None
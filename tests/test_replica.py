@@ -0,0 +1,66 @@
+from contextlib import contextmanager
+
+import pyarrow as pa
+
+import db
+import replica
+
+
+class StubCursor:
+    def __init__(self, remote):
+        self._remote = remote
+        self._table = None
+
+    def execute(self, query, params=()):
+        self._table = self._remote[query.split(" FROM ")[1].split()[0]]
+
+    def fetch_arrow_all(self, force_return_table=False):
+        if self._table.num_rows == 0 and not force_return_table:
+            return None
+        return self._table
+
+    def close(self):
+        pass
+
+
+class StubPool:
+    def __init__(self, remote):
+        self._remote = remote
+
+    @contextmanager
+    def connection(self):
+        conn = type("Conn", (), {})()
+        conn.cursor = lambda: StubCursor(self._remote)
+        yield conn
+
+
+def appointments(rows):
+    return pa.table({
+        "PERSON_ID": pa.array([person for person, _ in rows], pa.int64()),
+        "DESCRIPTION": pa.array([description for _, description in rows], pa.string()),
+    })
+
+
+def local_rows(path):
+    backend = replica.ReplicaBackend(path)
+    return backend.query("SELECT PERSON_ID, DESCRIPTION FROM APPOINTMENT ORDER BY PERSON_ID").values.tolist()
+
+
+def test_full_copy_follows_changes_and_deletes(tmp_path, monkeypatch):
+    path = str(tmp_path / "replica.duckdb")
+    remote = {"APPOINTMENT": appointments([(1, "Arzttermin"), (2, "Friseur")])}
+    monkeypatch.setattr(db, "get_pool", lambda: StubPool(remote))
+    tables = {"APPOINTMENT": replica.TABLES["APPOINTMENT"]}
+
+    assert replica.sync(path, tables) == {"APPOINTMENT": 2}
+    assert local_rows(path) == [[1, "Arzttermin"], [2, "Friseur"]]
+
+    # a future appointment is changed and another one is cancelled
+    remote["APPOINTMENT"] = appointments([(1, "Physiotherapie")])
+    replica.sync(path, tables)
+    assert local_rows(path) == [[1, "Physiotherapie"]]
+
+    # the last one is cancelled as well: the local table is emptied, not left as it was
+    remote["APPOINTMENT"] = appointments([])
+    assert replica.sync(path, tables) == {"APPOINTMENT": 0}
+    assert local_rows(path) == []
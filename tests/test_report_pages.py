@@ -0,0 +1,41 @@
+from report_pages import split_report
+
+
+def body(html):
+    return html.split("<body>", 1)[1].rsplit("</body>", 1)[0]
+
+
+def test_dropped_void_elements_do_not_swallow_the_report():
+    html = (
+        '<html><head><base href="https://example.org/"><meta charset="utf-8"></head><body>'
+        "<h2>Eins</h2><p>erster</p><embed src=\"x.swf\"><p>nach embed</p>"
+        "<h2>Zwei</h2><p>zweiter</p></body></html>"
+    )
+    sections = split_report(html)
+    assert [section.title for section in sections] == ["Eins", "Zwei"]
+    assert body(sections[0].html) == "<h2>Eins</h2><p>erster</p><p>nach embed</p>"
+    assert body(sections[1].html) == "<h2>Zwei</h2><p>zweiter</p>"
+
+
+def test_base_alone_keeps_the_body():
+    sections = split_report('<base href="https://example.org/"><p>Inhalt</p>')
+    assert len(sections) == 1
+    assert body(sections[0].html) == "<p>Inhalt</p>"
+
+
+def test_nested_dropped_elements():
+    html = (
+        "<h2>Eins</h2>"
+        '<object data="a"><param name="movie" value="a"><embed src="a"><iframe src="b"></iframe>Fallback</object>'
+        "<p>sichtbar</p><iframe><iframe></iframe>innen</iframe><p>auch sichtbar</p>"
+        "<h2>Zwei</h2><script>document.write('<h2>x</h2>')</script><p>Ende</p>"
+    )
+    sections = split_report(html)
+    assert [section.title for section in sections] == ["Eins", "Zwei"]
+    assert body(sections[0].html) == "<h2>Eins</h2><p>sichtbar</p><p>auch sichtbar</p>"
+    assert body(sections[1].html) == "<h2>Zwei</h2><p>Ende</p>"
+
+
+def test_self_closing_dropped_element():
+    sections = split_report('<p>vor</p><iframe src="x"/><p>nach</p>')
+    assert body(sections[0].html) == "<p>vor</p><p>nach</p>"
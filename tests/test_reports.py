@@ -0,0 +1,28 @@
+import sqlite3
+
+import fake_backend
+
+import db
+import queries
+import reports
+
+
+def test_download_matches_the_probed_version():
+    # a second report of the same type: without an order column the choice must still be stable
+    conn = sqlite3.connect(fake_backend.DB_URI, uri=True, isolation_level=None)
+    conn.execute("INSERT INTO OPENAI_REPORT VALUES ('outlier', '<h1>zweiter Bericht</h1>')")
+    try:
+        db.invalidate()
+        reports.reset()
+        version, html = reports.get_latest_report_version("outlier")
+        assert version == reports.get_report_version("outlier")
+        assert int(queries.fetch("report_by_version", report_type="outlier", version=version)["VERSION"].iloc[0]) == version
+        # a second call is answered from memory
+        before = fake_backend.stats.snapshot()["queries"]
+        assert reports.get_latest_report("outlier") == html
+        assert fake_backend.stats.snapshot()["queries"] == before
+    finally:
+        conn.execute("DELETE FROM OPENAI_REPORT WHERE REPORT = '<h1>zweiter Bericht</h1>'")
+        conn.close()
+        db.invalidate()
+        reports.reset()
@@ -0,0 +1,37 @@
+from datetime import date, datetime
+
+import pandas as pd
+
+from resident_week import Appointment, Week
+
+
+def week():
+    rows = [
+        ("meal", None, date(2025, 3, 17), "lunch", "Pizza"),
+        ("appointment", 3, datetime(2025, 3, 18, 10), None, "Arzt"),
+        ("appointment", 1, datetime(2025, 3, 20, 9), None, "Friseur"),
+        ("appointment", 1, datetime(2025, 3, 17, 15), None, "Besuch"),
+        ("appointment", 5, datetime(2025, 3, 19, 11), None, "Gymnastik"),
+    ]
+    df = pd.DataFrame(rows, columns=["KIND", "PERSON_ID", "TIME_STAMP", "LABEL", "TEXT"])
+    return Week(date(2025, 3, 17), (5, 0), df)
+
+
+def test_appointments_of_a_resident_in_time_order():
+    assert week().appointments(1) == [
+        Appointment(datetime(2025, 3, 17, 15), "Besuch"), Appointment(datetime(2025, 3, 20, 9), "Friseur"),
+    ]
+    assert week().appointments(3) == [Appointment(datetime(2025, 3, 18, 10), "Arzt")]
+    assert week().appointments(5) == [Appointment(datetime(2025, 3, 19, 11), "Gymnastik")]
+
+
+def test_residents_without_appointments():
+    # before the first, between two and after the last resident with appointments
+    for resident in (0, 2, 4, 99):
+        assert week().appointments(resident) == []
+    empty = pd.DataFrame(columns=["KIND", "PERSON_ID", "TIME_STAMP", "LABEL", "TEXT"])
+    assert Week(date(2025, 3, 17), (0, 0), empty).appointments(1) == []
+
+
+def test_meals_by_day():
+    assert week().meals == {date(2025, 3, 17): {"lunch": "Pizza"}}
@@ -0,0 +1,74 @@
+import threading
+import time
+
+import shared_cache
+from cache import QueryCache
+from shared_cache import SharedCache, SQLiteStore
+
+
+def test_concurrent_loads_run_one_loader(tmp_path):
+    store = SQLiteStore(str(tmp_path / "cache.db"))
+    shared = SharedCache(store, poll=0.01)
+    calls = []
+
+    def loader():
+        calls.append(1)
+        time.sleep(0.2)
+        return {"rows": 3}
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(shared.load("k", loader, ttl=60))) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+    assert results == [{"rows": 3}] * 6
+    assert len(calls) == 1
+
+
+def test_stale_value_is_served_while_another_replica_reloads(tmp_path):
+    store = SQLiteStore(str(tmp_path / "cache.db"))
+    shared = SharedCache(store, poll=0.01)
+    shared.load("k", lambda: "old", ttl=0.05, stale_ttl=60)
+    time.sleep(0.1)
+    token = store.lock("k", 60)  # another replica is reloading
+    assert shared.load("k", lambda: "new", ttl=0.05, stale_ttl=60) == "old"
+    store.unlock("k", token)
+    assert shared.load("k", lambda: "new", ttl=0.05, stale_ttl=60) == "new"
+
+
+def test_unreachable_store_loads_directly():
+    class Broken:
+        def __getattr__(self, name):
+            def fail(*args):
+                raise OSError("connection refused")
+            return fail
+
+    assert SharedCache(Broken()).load("k", lambda: "direct") == "direct"
+
+
+def test_store_that_cannot_be_opened_is_retried(tmp_path, monkeypatch):
+    monkeypatch.setattr(shared_cache, "_shared", None)
+    monkeypatch.setattr(shared_cache, "_shared_retry_at", 0.0)
+    monkeypatch.setattr(shared_cache, "SHARED_CACHE_RETRY", 0.05)
+    monkeypatch.setenv("SHARED_CACHE", "sqlite:///" + str(tmp_path / "missing" / "cache.db"))
+    assert shared_cache.get_shared_cache() is None  # the directory does not exist yet
+    (tmp_path / "missing").mkdir()
+    assert shared_cache.get_shared_cache() is None  # not before the retry delay
+    time.sleep(0.1)
+    assert isinstance(shared_cache.get_shared_cache(), SharedCache)
+
+
+def test_local_entry_keeps_the_shared_entry_age(tmp_path):
+    shared = SharedCache(SQLiteStore(str(tmp_path / "cache.db")), poll=0.01)
+    shared.load("k", lambda: "first", ttl=0.3, stale_ttl=0)  # stored by another replica
+    time.sleep(0.2)
+    local = QueryCache(default_stale_ttl=0)
+
+    def loader():
+        return shared.load("k", lambda: "second", ttl=0.3, stale_ttl=0, with_age=True)
+
+    assert local.get_or_load("k", loader, ttl=0.3) == "first"
+    time.sleep(0.15)
+    # 0.35 s after the shared load: expired, although it entered the local cache 0.15 s ago
+    assert local.get_or_load("k", loader, ttl=0.3) == "second"
@@ -0,0 +1,53 @@
+import os
+import sqlite3
+
+import pytest
+
+import fake_backend
+
+import db
+import outlier_detector
+import snapshot
+
+
+def test_created_at_of_the_served_bundle(tmp_path, monkeypatch):
+    monkeypatch.setenv("DASHBOARD_DATE", "2025-03-19")
+    monkeypatch.setenv("SNAPSHOT_DIR", str(tmp_path))
+    snapshot.reset()
+    try:
+        assert snapshot.created_at() is None  # nothing exported yet
+        bundle, _ = snapshot.export(str(tmp_path))
+        assert snapshot.open_current() == bundle
+        assert snapshot.created_at().strftime("%Y%m%dT%H%M%S") == bundle
+    finally:
+        snapshot.reset()
+        db.invalidate()
+
+
+def test_detector_mode_exports_without_the_summary_table(tmp_path, monkeypatch):
+    monkeypatch.setenv("DASHBOARD_DATE", "2025-03-19")
+    monkeypatch.setattr(outlier_detector, "ENABLED", True)
+    conn = sqlite3.connect(fake_backend.DB_URI, uri=True, isolation_level=None)
+    conn.execute("ALTER TABLE OUTLIER_DAILY_SUMMARY RENAME TO OUTLIER_DAILY_SUMMARY_AWAY")
+    try:
+        bundle, written = snapshot.export(str(tmp_path))
+        names = [dataset["name"] for dataset in written]
+        assert "attendance_history" in names and "outlier_count" not in names
+        assert os.listdir(tmp_path / bundle)
+    finally:
+        conn.execute("ALTER TABLE OUTLIER_DAILY_SUMMARY_AWAY RENAME TO OUTLIER_DAILY_SUMMARY")
+        conn.close()
+        db.invalidate()
+
+
+def test_failed_export_leaves_no_work_directory(tmp_path, monkeypatch):
+    monkeypatch.setenv("DASHBOARD_DATE", "2025-03-19")
+
+    def fail(path, table):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(snapshot, "_write", fail)
+    with pytest.raises(OSError):
+        snapshot.export(str(tmp_path))
+    assert os.listdir(tmp_path) == []
+    db.invalidate()
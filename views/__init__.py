@@ -0,0 +1,18 @@
+"""
+Dashboard pages. Each module exposes TITLE and render() and imports its heavy dependencies
+(Snowflake, pandas, Plotly, the calendar component) itself, so app.py only pays for a page's
+imports the first time that page is shown.
+"""
+import importlib
+
+# page title -> module, in sidebar order
+PAGES = {
+    "Pflege Dashboard": "views.pflege",
+    "Wochen Empfehlungen": "views.wochen",
+    "Bewohner Dashboard": "views.bewohner",
+    "Anwesenheits-Trends": "views.trends",
+}
+
+
+def load_page(title):
+    return importlib.import_module(PAGES[title])
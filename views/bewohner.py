@@ -0,0 +1,143 @@
+import os
+
+import streamlit as st
+from streamlit_calendar import calendar
+
+import appointments
+import resident_week
+from instrumentation import section
+from payload import measured
+from weather import get_weather_service
+
+TITLE = "Bewohner Dashboard"
+WEEKDAY_NAMES = ["Montag", "Dienstag", "Mittwoch", "Donnerstag", "Freitag", "Samstag", "Sonntag"]
+
+
+# Weather and calendar are fragments: the weather card refreshes itself and calendar
+# interactions rerun only the calendar, not the whole page
+@st.fragment(run_every=300)
+@measured("weather_card")
+def weather_card():
+    # shared reading, refreshed in the background (see weather.py)
+    temperatur = get_weather_service().current_temperature()
+    st.metric("Wetter Heute", "Sonnig, " + str(temperatur) + "°C")
+
+
+# With RESIDENT_WEEK_PREFETCH=1 the week is served from memory for all residents (see
+# resident_week.py); the card rechecks the week's version every few minutes
+@st.fragment(run_every=300)
+@measured("week_card")
+def week_card(resident):
+    import queries
+
+    with section("bewohner:week"):
+        week = resident_week.get_week()
+    today = queries.dashboard_params()["reference_date"]
+    for day in week.days():
+        meals = week.meals.get(day, {})
+        label = WEEKDAY_NAMES[day.weekday()] + (" (Heute)" if day == today else "")
+        st.metric(label, meals.get("lunch") or " / ".join(meals.values()) or "–")
+    if resident is not None:
+        upcoming = [item for item in week.appointments(resident) if appointments.as_date(item.time_stamp) >= today]
+        if upcoming:
+            st.markdown("**Ihre Termine diese Woche**")
+            st.markdown("\n".join(
+                f"- {WEEKDAY_NAMES[appointments.as_date(item.time_stamp).weekday()]}: {item.description}" for item in upcoming
+            ))
+
+
+def resident_id():
+    """Resident of this view: ?resident=<PERSON_ID> in the URL, else DASHBOARD_RESIDENT; None if not a number."""
+    value = st.query_params.get("resident") or os.environ.get("DASHBOARD_RESIDENT")
+    try:
+        # PERSON_ID is numeric; any other value would be bound against it in the queries
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def shift_calendar_month(months):
+    st.session_state.calendar_month = appointments.shift_month(st.session_state.calendar_month, months)
+
+
+# The calendar component does not report its visible range back, so months are switched with
+# these buttons and only the appointments of the visible grid are loaded (see appointments.py)
+@st.fragment
+@measured("calendar_card")
+def calendar_card(resident):
+    import queries
+
+    if "calendar_month" not in st.session_state:
+        st.session_state.calendar_month = queries.dashboard_params()["reference_date"].replace(day=1)
+    month = st.session_state.calendar_month
+
+    previous_col, today_col, next_col = st.columns(3)
+    previous_col.button("‹ Vormonat", key="calendar_previous", on_click=shift_calendar_month, args=(-1,))
+    today_col.button("Heute", key="calendar_today", on_click=st.session_state.pop, args=("calendar_month",))
+    next_col.button("Nächster Monat ›", key="calendar_next", on_click=shift_calendar_month, args=(1,))
+
+    custom_css = """
+    .fc-event-title {
+        white-space: normal !important;
+        text-overflow: ellipsis;
+        height: 100%;
+        overflow: hidden;
+        ont-weight: 700;
+    }
+    .fc-daygrid-day-events {
+        width: 120% !important;
+        height: 100%;
+        overflow-x: auto;
+        overflow-y: auto;
+    }
+    """
+    calendar_options = {
+        "height": "auto",  # Automatically adjusts height based on content
+        "contentHeight": 400,  # Sets the height of the calendar body
+        "aspectRatio": 1.5,  # Adjusts the width-to-height ratio
+        "initialView": "dayGridMonth",  # Ensures the calendar starts in month view
+        "initialDate": month.isoformat(),
+        "firstDay": 1,  # weeks start on Monday, as in appointments.month_grid
+        "headerToolbar": {"left": "", "center": "title", "right": ""},  # navigation via the buttons above
+    }
+
+    if resident is None:
+        st.caption("Kein Bewohner ausgewählt (?resident=<ID>)")
+        events = []
+    else:
+        with section("bewohner:appointments"):
+            events = appointments.calendar_events(resident, *appointments.month_grid(month))
+    with section("bewohner:calendar"):
+        # one component instance per month: FullCalendar only reads initialDate when it mounts
+        calendar(events=events, custom_css=custom_css, options=calendar_options, key=f"Termine-{month:%Y-%m}")
+
+
+def render():
+    st.title(TITLE)
+    st.subheader("Herzlich Willkommen, lieber Bewohner!")
+    st.write("Hier finden Sie Ihre heutige Übersicht.")
+
+    # ----- Wetter Card -----
+    weather_card()
+
+    # ----- Row 2: Meal Plan & Calendar -----
+    col1, col2 = st.columns(2)
+
+    # Meal Plan Card
+    with col1:
+        st.subheader("Speiseplan (Woche)")
+        if resident_week.ENABLED:
+            week_card(resident_id())
+        else:
+            st.metric("Montag", "Nudeln mit Tomatensauce")
+            st.metric("Dienstag", "Hähnchen mit Reis")
+            st.metric("Mittwoch", "Gemüsesuppe")
+            st.metric("Donnerstag (Heute)", "Fisch mit Kartoffeln")
+            st.metric("Freitag", "Pizza")
+            st.metric("Samstag", "Salat mit Brot")
+            st.metric("Sonntag", "Braten mit Knödel")
+
+    # Calendar/Appointments Card
+    with col2:
+        st.subheader("Kalender – Zukünftige Termine")
+        calendar_card(resident_id())
@@ -0,0 +1,33 @@
+import streamlit as st
+import streamlit.components.v1 as components
+
+from instrumentation import section
+from payload import measured
+from report_pages import get_report_pages
+
+
+def load_report(report_type):
+    return get_report_pages(report_type)
+
+
+# Only the selected section goes to the browser; switching sections reruns just this fragment
+@st.fragment
+@measured("report_card")
+def report_card(report_type):
+    with section(f"report:{report_type}:load"):
+        pages = load_report(report_type)
+    if pages is None or not pages.sections:
+        st.write(f"No {report_type} report found.")
+        return
+    titles = [report_section.title for report_section in pages.sections]
+    key = f"report_section_{report_type}"
+    if st.session_state.get(key, 0) >= len(titles):
+        st.session_state[key] = 0  # the new report version has fewer sections
+    index = 0
+    if len(titles) > 1:
+        index = st.selectbox(
+            "Abschnitt", range(len(titles)), format_func=titles.__getitem__, key=key, label_visibility="collapsed",
+        )
+    # Force white background for the HTML content
+    with section(f"report:{report_type}:iframe"):
+        components.html(pages.sections[index].html, height=600, scrolling=True)
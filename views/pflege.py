@@ -0,0 +1,124 @@
+import pandas as pd
+import plotly.express as px
+import streamlit as st
+
+import outlier_detector
+import prefetch
+import queries
+from db import iter_concurrently
+from instrumentation import section
+from views.common import load_report, report_card
+
+TITLE = "Pflege Dashboard"
+
+
+# With PREFETCH_CARETAKERS=1 the metrics come from the all-caretaker index (see prefetch.py)
+def load_count_in_care():
+    if prefetch.ENABLED:
+        return prefetch.caretaker_metrics().in_care
+    return queries.run("count_in_care").iloc[0].iloc[0]
+
+
+def load_outlier_count():
+    # with OUTLIER_SOURCE=detector the count is computed in the app (see outlier_detector.py)
+    if outlier_detector.ENABLED:
+        return outlier_detector.outlier_count()
+    if prefetch.ENABLED:
+        return prefetch.facility_metrics().outliers
+    return queries.run("outlier_count").iloc[0].iloc[0]
+
+
+def load_attendance():
+    """(appeared, not appeared) yesterday"""
+    if prefetch.ENABLED:
+        metrics = prefetch.facility_metrics()
+        return metrics.appeared_yes, metrics.appeared_no
+    df_pie_query = queries.run("attendance")
+    # a day without any (or without missed) meals has no row for that answer
+    counts = df_pie_query.set_index("APPEARED")["COUNT"]
+    return int(counts.get("Yes", 0)), int(counts.get("No", 0))
+
+
+def build_attendance_pie(appeared, not_appeared):
+    df_pie = pd.DataFrame({
+        'Status': ['War Anwesend', 'Nicht erschienen'],
+        'Count': [appeared, not_appeared]
+    })
+    fig = px.pie(df_pie, values='Count', names='Status', title='In Cafeteria gestern erschienen', hole=0.4)
+    fig.update_layout(
+        paper_bgcolor='rgba(0,0,0,0)',
+        plot_bgcolor='rgba(0,0,0,0)',
+        height=454,
+        margin=dict(l=40, r=40, t=40, b=40),
+    )
+    return fig
+
+
+# The cards have no widgets and only change with a full run, so they are plain functions;
+# only the report card, which has the section picker, is a fragment
+def metric_card(label, value):
+    with section("pflege:" + label):
+        st.metric(label, value)
+
+
+def attendance_chart(attendance):
+    if not any(attendance):
+        st.info("Keine Cafeteria-Daten von gestern.")
+        return
+    with section("pflege:attendance_figure"):
+        fig = build_attendance_pie(*attendance)
+    with section("pflege:attendance_render"):
+        st.plotly_chart(fig, use_container_width=True)
+
+
+def render():
+    st.title(TITLE)
+    st.subheader("Guten Morgen Pfleger*in Alex!")
+    st.write("Hier ist deine tägliche persönliche Übersicht.")
+
+    # Split the main page into two columns (50/50)
+    left_col, right_col = st.columns([1, 1])
+
+    # ---------------------- LEFT COLUMN ----------------------
+    with left_col:
+
+        # Top row: two metrics side by side
+        top_row1, top_row2 = st.columns(2)
+        with top_row1:
+            count_slot = st.empty()
+            count_slot.metric("In Pflege heute", "…")
+        with top_row2:
+            outlier_slot = st.empty()
+            outlier_slot.metric("Daten Ausreißer gefunden", "…")
+
+        st.write("")  # Spacer
+        pie_slot = st.empty()
+
+    # ---------------------- RIGHT COLUMN ----------------------
+    with right_col:
+        report_slot = st.empty()
+
+    # The four queries are independent: warm them concurrently and fill each card as its result arrives
+    loaders = {
+        "count_in_care": load_count_in_care,
+        "outlier_count": load_outlier_count,
+        "df_pie_query": load_attendance,
+        "outlier_report": lambda: load_report("outlier"),
+    }
+    slots = {"count_in_care": count_slot, "outlier_count": outlier_slot, "df_pie_query": pie_slot, "outlier_report": report_slot}
+    for name, result, error in iter_concurrently(loaders):
+        if error is not None:
+            # only this card shows the failure, the others still render
+            slots[name].warning("Daten konnten nicht geladen werden.")
+        elif name == "count_in_care":
+            with count_slot.container():
+                metric_card("In Pflege heute", result)
+        elif name == "outlier_count":
+            with outlier_slot.container():
+                metric_card("Daten Ausreißer gefunden", result)
+        elif name == "df_pie_query":
+            with pie_slot.container():
+                attendance_chart(result)
+        elif name == "outlier_report":
+            with report_slot.container():
+                report_card("outlier")
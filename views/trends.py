@@ -0,0 +1,52 @@
+import streamlit as st
+
+import attendance_trends
+from instrumentation import section
+from payload import measured
+
+TITLE = "Anwesenheits-Trends"
+
+RANGES = {"4 Wochen": 28, "3 Monate": 91, "12 Monate": 365}
+GROUPS = {"Mahlzeit": "MEALTIME", "Pfleger*in": "EMPLOYEE"}
+
+
+def build_trend_chart(df, group_label):
+    import plotly.express as px
+
+    # WebGL keeps a year of daily points per line cheap to draw
+    fig = px.line(
+        df, x="DAY", y="RATE", color="GROUP", render_mode="webgl",
+        labels={"DAY": "Datum", "RATE": "Anwesenheit", "GROUP": group_label},
+        title="Anwesenheit pro " + group_label,
+    )
+    fig.update_layout(
+        paper_bgcolor='rgba(0,0,0,0)',
+        plot_bgcolor='rgba(0,0,0,0)',
+        height=454,
+        margin=dict(l=40, r=40, t=40, b=40),
+        yaxis_tickformat=".0%",
+    )
+    return fig
+
+
+# Range and grouping only rerun this fragment; the series come from the local trend cache
+@st.fragment
+@measured("trend_card")
+def trend_card():
+    left, right = st.columns(2)
+    range_label = left.selectbox("Zeitraum", list(RANGES), index=1, key="trend_range")
+    group_label = right.radio("Gruppiert nach", list(GROUPS), horizontal=True, key="trend_group")
+    with section("trends:series"):
+        series = attendance_trends.daily_series(RANGES[range_label], GROUPS[group_label])
+        series = attendance_trends.downsample(series)
+    if series.empty:
+        st.write("Keine Anwesenheitsdaten im gewählten Zeitraum.")
+        return
+    with section("trends:chart"):
+        st.plotly_chart(build_trend_chart(series, group_label), use_container_width=True)
+
+
+def render():
+    st.title(TITLE)
+    st.write("Anwesenheit in der Cafeteria über Wochen und Monate.")
+    trend_card()
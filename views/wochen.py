@@ -0,0 +1,52 @@
+import streamlit as st
+
+import forecast
+from instrumentation import section
+from views.common import report_card
+
+TITLE = "Wochen Empfehlungen"
+
+
+def build_forecast_chart(table):
+    import plotly.express as px
+
+    fig = px.bar(
+        table, x="Datum", y="Erwartet", color="Mahlzeit", barmode="group",
+        hover_data=["Gericht"], title="Erwartete Teilnahme",
+    )
+    fig.update_layout(
+        paper_bgcolor='rgba(0,0,0,0)',
+        plot_bgcolor='rgba(0,0,0,0)',
+        height=400,
+        margin=dict(l=40, r=40, t=40, b=40),
+        legend_title_text="",
+    )
+    return fig
+
+
+# Forecast computed in the app from attendance and meal plan (see forecast.py)
+def forecast_card():
+    with section("wochen:forecast"):
+        table = forecast.forecast_table(forecast.weekly_forecast())
+    if table.empty:
+        st.write("Keine Prognose für die kommende Woche: kein Speiseplan oder keine Anwesenheitsdaten gefunden.")
+        return
+    with section("wochen:forecast_chart"):
+        st.plotly_chart(build_forecast_chart(table), use_container_width=True)
+    st.dataframe(
+        table,
+        hide_index=True,
+        use_container_width=True,
+        column_config={"Quote": st.column_config.ProgressColumn("Quote", format="percent", min_value=0, max_value=1)},
+    )
+
+
+def render():
+    st.title(TITLE)
+    st.subheader("Guten Morgen Pfleger*in Alex!")
+    st.write("Pflege Forecast")
+
+    if forecast.ENABLED:
+        forecast_card()
+    else:
+        report_card("forecast")
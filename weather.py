@@ -0,0 +1,132 @@
+import os
+import time
+import threading
+from datetime import datetime, timezone
+
+import requests
+
+from shared_cache import get_shared_cache
+
+# Endpoints are configurable so the service can run against a local stub server
+LOGIN_URL = "https://login.meteomatics.com/api/v1/token"
+API_URL = "https://api.meteomatics.com"
+LOCATION = "48.2083537,16.3725042"  # Wien
+FALLBACK_TEMPERATURE = 7
+
+
+class WeatherService:
+    """
+    App-wide current temperature from Meteomatics.
+    A daemon thread refreshes the reading every `refresh_interval` seconds, reusing the OAuth
+    token until shortly before it expires. Readers get the last known value immediately; only
+    the very first read waits (at most `first_wait` seconds) for an initial reading.
+    With a `shared` cache (see shared_cache.py) one replica calls the API per interval and the
+    others reuse its reading.
+    """
+
+    def __init__(self, username, password, login_url=LOGIN_URL, api_url=API_URL,
+                 refresh_interval=900, timeout=5, token_ttl=7000, first_wait=2, shared=None):
+        self._auth = (username, password)
+        self._login_url = login_url
+        self._api_url = api_url.rstrip("/")
+        self._refresh_interval = refresh_interval
+        self._timeout = timeout
+        self._token_ttl = token_ttl
+        self._first_wait = first_wait
+        self._shared = shared
+        self._token = None
+        self._token_expires = 0
+        self._temperature = None
+        self._updated_at = None
+        self._lock = threading.Lock()
+        self._first_reading = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="weather-refresh", daemon=True)
+                self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def current_temperature(self):
+        self._first_reading.wait(self._first_wait)
+        with self._lock:
+            return FALLBACK_TEMPERATURE if self._temperature is None else self._temperature
+
+    @property
+    def updated_at(self):
+        with self._lock:
+            return self._updated_at
+
+    def refresh(self):
+        """Fetch a new reading now. Returns False (keeping the last value) if the API failed."""
+        try:
+            if self._shared is None:
+                temperature = self._fetch_temperature()
+            else:
+                temperature = self._shared.load(
+                    "weather:temperature", self._fetch_temperature,
+                    ttl=self._refresh_interval, stale_ttl=self._refresh_interval,
+                )
+        except (requests.exceptions.RequestException, KeyError, IndexError, ValueError):
+            return False
+        with self._lock:
+            self._temperature = temperature
+            self._updated_at = datetime.now()
+        return True
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.refresh()
+            # unblock the first reader whether or not the API answered
+            self._first_reading.set()
+            self._stop.wait(self._refresh_interval)
+
+    def _get_token(self):
+        if self._token is None or time.monotonic() >= self._token_expires:
+            response = requests.get(self._login_url, auth=self._auth, timeout=self._timeout)
+            response.raise_for_status()
+            self._token = response.json()['access_token']
+            self._token_expires = time.monotonic() + self._token_ttl
+        return self._token
+
+    def _fetch_temperature(self):
+        for attempt in range(2):
+            now = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+            response = requests.get(
+                f"{self._api_url}/{now}/t_2m:C/{LOCATION}/json",
+                params={"model": "mix", "access_token": self._get_token()},
+                timeout=self._timeout,
+            )
+            if response.status_code == 401 and attempt == 0:
+                # token revoked or expired early: log in again once
+                self._token = None
+                continue
+            response.raise_for_status()
+            data = response.json()
+            return data['data'][0]['coordinates'][0]['dates'][0]['value']
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_weather_service():
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = WeatherService(
+                os.environ.get("WEATHER_USERNAME"),
+                os.environ.get("WEATHER_PASSWORD"),
+                login_url=os.environ.get("WEATHER_LOGIN_URL", LOGIN_URL),
+                api_url=os.environ.get("WEATHER_API_URL", API_URL),
+                refresh_interval=float(os.environ.get("WEATHER_REFRESH_INTERVAL", 900)),
+                timeout=float(os.environ.get("WEATHER_TIMEOUT", 5)),
+                shared=get_shared_cache(),
+            ).start()
+        return _service